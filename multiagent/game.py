@@ -21,6 +21,7 @@
 # For more info, see http://inst.eecs.berkeley.edu/~cs188/sp09/pacman.html
 
 from util import *
+import random
 import time
 import os
 import traceback
@@ -37,7 +38,12 @@ class Agent:
     following methods which will be called if they exist:
 
     def registerInitialState(self, state): # inspects the starting state
+
+    An agent that never edits the states it is handed and cannot crash or
+    stall may set trustedAgent = True.  Headless games in which every agent
+    does so run in Game.runTrustedLoop, which hands out the live state.
     """
+    trustedAgent = False
 
     def __init__(self, index=0):
         self.index = index
@@ -231,6 +237,18 @@ class Grid:
         g.data = self.data
         return g
 
+    def copyWithCell(self, x, y, value):
+        """
+        Returns a copy with grid[x][y] set to value.  Only column x is
+        duplicated; every other column is shared with this grid, so neither
+        grid may be mutated in place afterwards.
+        """
+        g = self.shallowCopy()
+        g.data = self.data[:]
+        g.data[x] = self.data[x][:]
+        g.data[x][y] = value
+        return g
+
     def count(self, item=True):
         return sum([x.count(item) for x in self.data])
 
@@ -262,7 +280,7 @@ class Grid:
         return tuple(bits)
 
     def _cellIndexToPosition(self, index):
-        x = index / self.height
+        x = index // self.height
         y = index % self.height
         return x, y
 
@@ -393,19 +411,51 @@ class Actions:
     getSuccessor = staticmethod(getSuccessor)
 
 
+_zobristKeys = {}
+
+
+def zobristKey(feature):
+    """
+    Returns the 64-bit Zobrist key for a hashable feature such as
+    ('food', x, y).  Keys are drawn lazily from a generator seeded by the
+    feature itself, so they are the same in every process and never touch
+    the global random state.
+    """
+    key = _zobristKeys.get(feature)
+    if key is None:
+        key = _zobristKeys[feature] = random.Random(repr(feature)).getrandbits(64)
+    return key
+
+
+def agentZobristKey(agentIndex, agentState):
+    config = agentState.configuration
+    if config == None:
+        return zobristKey(('agent', agentIndex, None))
+    return zobristKey(('agent', agentIndex, config.pos, config.direction, agentState.scaredTimer > 0))
+
+
 class GameStateData:
 
     def __init__(self, prevState=None):
         """
         Generates a new data packet by copying information from its predecessor.
+
+        Nothing is copied up front: the food grid, capsule list, eaten flags and
+        every AgentState are shared with prevState.  The game rules replace
+        whatever they change (see copyAgentState), so a successor only pays
+        for the agent that moved and the food cell it ate.
         """
         if prevState != None:
-            self.food = prevState.food.shallowCopy()
-            self.capsules = prevState.capsules[:]
-            self.agentStates = self.copyAgentStates(prevState.agentStates)
+            self.food = prevState.food
+            self.capsules = prevState.capsules
+            self.agentStates = prevState.agentStates[:]
             self.layout = prevState.layout
             self._eaten = prevState._eaten
             self.score = prevState.score
+            self._hash = prevState.getZobristKey()
+        else:
+            self._hash = None
+        self._staleAgents = None
 
         self._foodEaten = None
         self._foodAdded = None
@@ -418,6 +468,9 @@ class GameStateData:
     def deepCopy(self):
         state = GameStateData(self)
         state.food = self.food.deepCopy()
+        state.capsules = self.capsules[:]
+        state.agentStates = self.copyAgentStates(self.agentStates)
+        state._eaten = self._eaten[:]
         state.layout = self.layout.deepCopy()
         state._agentMoved = self._agentMoved
         state._foodEaten = self._foodEaten
@@ -431,6 +484,55 @@ class GameStateData:
             copiedStates.append(agentState.copy())
         return copiedStates
 
+    def copyAgentState(self, agentIndex):
+        """
+        Replaces the (possibly shared) AgentState at agentIndex with a private
+        copy and returns it.  Call this before mutating an agent's state.
+
+        The agent's Zobrist key is removed here and the new one is added back
+        the next time the key is read, after the rules have finished with it.
+        """
+        if self._hash is not None:
+            if self._staleAgents is None:
+                self._staleAgents = []
+            if agentIndex not in self._staleAgents:
+                self._hash ^= agentZobristKey(agentIndex, self.agentStates[agentIndex])
+                self._staleAgents.append(agentIndex)
+        agentState = self.agentStates[agentIndex].copy()
+        self.agentStates[agentIndex] = agentState
+        return agentState
+
+    def removeFood(self, x, y):
+        self.food = self.food.copyWithCell(x, y, False)
+        if self._hash is not None:
+            self._hash ^= zobristKey(('food', x, y))
+
+    def removeCapsule(self, position):
+        self.capsules = [c for c in self.capsules if c != position]
+        if self._hash is not None:
+            self._hash ^= zobristKey(('capsule', position))
+
+    def getZobristKey(self):
+        """
+        Returns the incrementally maintained 64-bit key for the agents, food
+        and capsules.  The score is folded in by __hash__.
+        """
+        if self._hash is None:
+            h = 0
+            for x, y in self.food.asList():
+                h ^= zobristKey(('food', x, y))
+            for capsule in self.capsules:
+                h ^= zobristKey(('capsule', capsule))
+            for agentIndex, agentState in enumerate(self.agentStates):
+                h ^= agentZobristKey(agentIndex, agentState)
+            self._hash = h
+            self._staleAgents = None
+        elif self._staleAgents:
+            for agentIndex in self._staleAgents:
+                self._hash ^= agentZobristKey(agentIndex, self.agentStates[agentIndex])
+            self._staleAgents = None
+        return self._hash
+
     def __eq__(self, other):
         """
         Allows two states to be compared.
@@ -438,6 +540,8 @@ class GameStateData:
         if other == None:
             return False
         # TODO Check for type of other
+        if isinstance(other, GameStateData) and self.getZobristKey() != other.getZobristKey():
+            return False
         if not self.agentStates == other.agentStates:
             return False
         if not self.food == other.food:
@@ -450,15 +554,10 @@ class GameStateData:
 
     def __hash__(self):
         """
-        Allows states to be keys of dictionaries.
+        Allows states to be keys of dictionaries.  This is O(1): the Zobrist
+        key is kept up to date as the game rules change the state.
         """
-        for i, state in enumerate(self.agentStates):
-            try:
-                int(hash(state))
-            except TypeError as e:
-                print(e)
-                # hash(state)
-        return int((hash(tuple(self.agentStates)) + 13*hash(self.food) + 113 * hash(tuple(self.capsules)) + 7 * hash(self.score)) % 1048575)
+        return self.getZobristKey() ^ zobristKey(('score', self.score))
 
     def __str__(self):
         width, height = self.layout.width, self.layout.height
@@ -536,6 +635,8 @@ class GameStateData:
             self.agentStates.append(AgentState(
                 Configuration(pos, Directions.STOP), isPacman))
         self._eaten = [False for a in self.agentStates]
+        self._hash = None
+        self._staleAgents = None
 
 
 try:
@@ -548,9 +649,14 @@ except:
 class Game:
     """
     The Game manages the control flow, soliciting actions from agents.
+
+    With trustedAgents set, run() uses runTrustedLoop: a stripped-down loop
+    for agents that are trusted not to crash, stall or edit the states they
+    are handed (see Agent.trustedAgent).
     """
 
-    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False):
+    def __init__(self, agents, display, rules, startingIndex=0, muteAgents=False, catchExceptions=False,
+                 trustedAgents=False):
         self.agentCrashed = False
         self.agents = agents
         self.display = display
@@ -559,6 +665,7 @@ class Game:
         self.gameOver = False
         self.muteAgents = muteAgents
         self.catchExceptions = catchExceptions
+        self.trustedAgents = trustedAgents and not catchExceptions and not muteAgents
         self.moveHistory = []
         self.totalAgentTimes = [0 for agent in agents]
         self.totalAgentTimeWarnings = [0 for agent in agents]
@@ -601,6 +708,41 @@ class Game:
         sys.stdout = OLD_STDOUT
         sys.stderr = OLD_STDERR
 
+    def runTrustedLoop(self, agentIndex):
+        """
+        Plays the game to the end without the per-move safety net of run():
+        agents get the live state instead of a deep copy, so an agent that
+        edits it (or the Grids and AgentStates it shares copy-on-write with
+        other states) corrupts the game.  Observation functions are looked up
+        once, and no timers are armed or output redirected.  Agent time is still
+        added up in totalAgentTimes.
+        """
+        agents = self.agents
+        observers = [getattr(agent, 'observationFunction', None) for agent in agents]
+        numAgents = len(agents)
+        display = self.display
+        rules = self.rules
+        totalAgentTimes = self.totalAgentTimes
+
+        while not self.gameOver:
+            start_time = time.time()
+            observer = observers[agentIndex]
+            if observer is None:
+                observation = self.state
+            else:
+                observation = observer(self.state)
+            action = agents[agentIndex].getAction(observation)
+            totalAgentTimes[agentIndex] += time.time() - start_time
+
+            self.moveHistory.append((agentIndex, action))
+            self.state = self.state.generateSuccessor(agentIndex, action)
+            display.update(self.state.data)
+            rules.process(self.state, self)
+            agentIndex = (agentIndex + 1) % numAgents
+
+            if _BOINC_ENABLED:
+                boinc.set_fraction_done(self.getProgress())
+
     def run(self):
         """
         Main control loop for game play.
@@ -643,13 +785,18 @@ class Game:
                         self.unmute()
                         return
                 else:
+                    start_time = time.time()
                     agent.registerInitialState(self.state.deepCopy())
+                    self.totalAgentTimes[i] += time.time() - start_time
                 # TODO: could this exceed the total time
                 self.unmute()
 
         agentIndex = self.startingIndex
         numAgents = len(self.agents)
 
+        if self.trustedAgents:
+            self.runTrustedLoop(agentIndex)
+
         while not self.gameOver:
             # Fetch the next agent
             agent = self.agents[agentIndex]
@@ -674,8 +821,10 @@ class Game:
                         self.unmute()
                         return
                 else:
+                    start_time = time.time()
                     observation = agent.observationFunction(
                         self.state.deepCopy())
+                    move_time += time.time() - start_time
                 self.unmute()
             else:
                 observation = self.state.deepCopy()
@@ -729,7 +878,9 @@ class Game:
                     self.unmute()
                     return
             else:
+                start_time = time.time()
                 action = agent.getAction(observation)
+                self.totalAgentTimes[agentIndex] += move_time + time.time() - start_time
             self.unmute()
 
             # Execute the action
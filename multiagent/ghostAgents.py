@@ -38,6 +38,7 @@ class GhostAgent(Agent):
 
 class RandomGhost(GhostAgent):
     "A ghost that chooses a legal action uniformly at random."
+    trustedAgent = True
 
     def getDistribution(self, state):
         dist = util.Counter()
@@ -49,6 +50,7 @@ class RandomGhost(GhostAgent):
 
 class DirectionalGhost(GhostAgent):
     "A ghost that prefers to rush Pacman, or flee when scared."
+    trustedAgent = True
 
     def __init__(self, index, prob_attack=0.8, prob_scaredFlee=0.8):
         self.index = index
@@ -14,7 +14,11 @@
 
 from util import manhattanDistance
 from game import Directions
-import random, util
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import copy
+import multiprocessing
+import random, util, time
 
 from game import Agent
 from pacman import GameState
@@ -100,6 +104,131 @@ def scoreEvaluationFunction(currentGameState: GameState):
     return currentGameState.getScore()
 
 
+class TranspositionTable:
+    """
+    A size-bounded cache of search values keyed by (state hash, agent index,
+    remaining depth).  Each entry is a (value, flag) pair where flag says
+    whether value is EXACT or only a LOWER or UPPER bound, as produced by
+    alpha-beta cutoffs.  The state itself is stored alongside and compared
+    on lookup, so two states whose 64-bit hashes collide never share a value.
+
+    When the table is full, the 'lru' policy evicts the least recently used
+    entry and the 'depth' policy evicts the oldest entry with the smallest
+    remaining depth, since that is the cheapest one to search again.
+    """
+    EXACT, LOWER, UPPER = 'exact', 'lower', 'upper'
+
+    def __init__(self, maxSize=100000, policy='lru'):
+        if policy not in ('lru', 'depth'):
+            raise Exception('Unknown replacement policy: ' + str(policy))
+        self.maxSize = maxSize
+        self.policy = policy
+        self.buckets = {}  # remaining depth (or None for lru) -> OrderedDict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _bucket(self, depth):
+        if self.policy == 'lru':
+            depth = None
+        if depth not in self.buckets:
+            self.buckets[depth] = OrderedDict()
+        return self.buckets[depth]
+
+    def lookup(self, state, agentIndex, depth):
+        key = (hash(state), agentIndex, depth)
+        bucket = self._bucket(depth)
+        entry = bucket.get(key)
+        if entry is None or entry[0] != state:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == 'lru':
+            bucket.move_to_end(key)
+        return entry[1:]
+
+    def store(self, state, agentIndex, depth, value, flag=EXACT):
+        key = (hash(state), agentIndex, depth)
+        bucket = self._bucket(depth)
+        if key not in bucket:
+            if self.size >= self.maxSize:
+                self._evict()
+            self.size += 1
+        bucket[key] = (state, value, flag)
+        bucket.move_to_end(key)
+
+    def clear(self):
+        "Drops every entry, keeping the hit, miss and eviction counts."
+        self.buckets = {}
+        self.size = 0
+
+    def _evict(self):
+        if self.policy == 'lru':
+            bucket = self.buckets[None]
+        else:
+            bucket = self.buckets[min(d for d, b in self.buckets.items() if b)]
+        bucket.popitem(last=False)
+        self.size -= 1
+        self.evictions += 1
+
+    def getHitRate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return float(self.hits) / lookups
+
+    def __str__(self):
+        return 'Transposition table: %d/%d entries, %d hits, %d misses (%.1f%% hit rate), %d evictions' % (
+            self.size, self.maxSize, self.hits, self.misses, 100 * self.getHitRate(), self.evictions)
+
+
+class SearchTimeout(Exception):
+    """
+    Raised from inside a search when the anytime move budget runs out.
+    """
+    pass
+
+
+_parallelWorker = {}
+
+
+def _initParallelWorker(agent, layout, sharedAlpha):
+    _parallelWorker['agent'] = agent
+    _parallelWorker['layout'] = layout
+    _parallelWorker['alpha'] = sharedAlpha
+    _parallelWorker['root'] = None
+
+
+def _parallelRootValue(encoding, depth, action, deadline):
+    """
+    Runs in a worker process: searches one root action and returns
+    (value, alpha, nodes, principal variation) where alpha is the shared
+    bound the search started from.  A value <= alpha is only an upper bound
+    on the true value.  The principal variation is None for agents that do
+    not keep one.
+    """
+    agent = _parallelWorker['agent']
+    sharedAlpha = _parallelWorker['alpha']
+    if encoding != _parallelWorker['root']:
+        # A new move: fixed-depth searches cannot reuse the last move's entries
+        _parallelWorker['root'] = encoding
+        if agent.transpositionTable is not None and not agent.anytime:
+            agent.transpositionTable.clear()
+    state = GameState.fromCompactEncoding(_parallelWorker['layout'], encoding)
+    alpha = sharedAlpha.value if isinstance(agent, AlphaBetaAgent) else -float('inf')
+    nodes = getattr(agent, 'nodesExpanded', 0)
+    agent.deadline = deadline
+    try:
+        v = agent.searchRoot(state, depth, [action], alpha)[1]
+    finally:
+        agent.deadline = None
+    if v > alpha:
+        with sharedAlpha.get_lock():
+            sharedAlpha.value = max(sharedAlpha.value, v)
+    return v, alpha, getattr(agent, 'nodesExpanded', 0) - nodes, getattr(agent, 'principalVariation', None)
+
+
 class MultiAgentSearchAgent(Agent):
     """
     This class provides some common elements to all of your
@@ -113,12 +242,191 @@ class MultiAgentSearchAgent(Agent):
     Note: this is an abstract class: one that should not be instantiated.  It's
     only partially specified, and designed to be extended.  Agent (game.py)
     is another abstract class.
-    """
 
-    def __init__(self, evalFn='scoreEvaluationFunction', depth='2'):
+    Passing ttSize > 0 (e.g. -a ttSize=200000,ttPolicy=depth) gives the agent
+    a TranspositionTable; its statistics are printed when the game ends.  It
+    is off by default because it changes the set of states a search
+    generates.  Keys include the score and remaining depth, so a fixed-depth
+    search can never hit an entry from an earlier move and the table is
+    cleared before each one; anytime search keeps it, since its deeper
+    rounds do meet states the previous move searched.
+
+    Passing anytime=True ignores depth and deepens one round at a time until
+    the move budget runs out, then plays the best move of the deepest search
+    that finished.  Each round tries the previous round's best move first.
+    The budget is moveTime seconds if given, capped so the game's timing
+    limits are never hit (see moveBudget).
+
+    Passing parallel=N (N > 1) searches the root actions in a pool of N worker
+    processes.  States are shipped as GameState.getCompactEncoding tuples and
+    alpha-beta workers share the root alpha bound.  The chosen action is the
+    one the serial search would choose.
+    """
+    ANYTIME_SAFETY = 0.8  # Fraction of the rules' time limits to search for
+    ANYTIME_MOVES_PER_FOOD = 2  # Moves expected per food left, to share out the total time
+    ANYTIME_MIN_MOVES_LEFT = 10  # Fewest moves the total time is shared out over
+    DEFAULT_MOVE_TIME = 1.0  # Budget when no game rules supply one
+    MAX_ANYTIME_DEPTH = 100
+
+    def __init__(self, evalFn='scoreEvaluationFunction', depth='2', ttSize='0', ttPolicy='lru',
+                 anytime='False', moveTime='0', parallel='1'):
         self.index = 0  # Pacman is always agent index 0
         self.evaluationFunction = util.lookup(evalFn, globals())
         self.depth = int(depth)
+        self.transpositionTable = None
+        if int(ttSize) > 0:
+            self.transpositionTable = TranspositionTable(int(ttSize), ttPolicy)
+        self.anytime = str(anytime) == 'True'
+        self.moveTime = float(moveTime)
+        self.deadline = None
+        self.rules = None
+        self.timeUsed = 0.0
+        self.depthsReached = []
+        self.parallel = int(parallel)
+        self.pool = None
+        self.poolLayoutText = None
+        self.sharedAlpha = None
+
+    def registerInitialState(self, gameState: GameState):
+        """
+        Called by Game.run at the start of each game: clears the statistics
+        final() reports, so that with -n > 1 they cover one game each.
+        """
+        self.depthsReached = []
+
+    def setMoveTimeBudget(self, rules):
+        """
+        Called by ClassicGameRules.newGame with the game's rules, so that
+        moveBudget can keep anytime search clear of their timing limits.
+        """
+        self.rules = rules
+        self.timeUsed = 0.0
+
+    def moveBudget(self, gameState):
+        """
+        Seconds the next anytime search may take: moveTime (DEFAULT_MOVE_TIME
+        if unset and there are no rules), but never more than ANYTIME_SAFETY
+        of the rules' move warning time, nor of the total time left for the
+        game shared out over the moves expected to remain.  The time already
+        used is measured, so a move that overruns shrinks the later budgets.
+        """
+        if self.rules is None:
+            return self.moveTime if self.moveTime > 0 else self.DEFAULT_MOVE_TIME
+        movesLeft = max(self.ANYTIME_MIN_MOVES_LEFT, self.ANYTIME_MOVES_PER_FOOD * gameState.getNumFood())
+        timeLeft = max(0.0, self.rules.getMaxTotalTime(self.index) - self.timeUsed)
+        limit = self.ANYTIME_SAFETY * min(self.rules.getMoveWarningTime(self.index), timeLeft / movesLeft)
+        if self.moveTime > 0:
+            return min(self.moveTime, limit)
+        return limit
+
+    def searchRoot(self, gameState, depth, actions, alpha=-float('inf')):
+        """
+        Searches depth rounds below gameState, trying the root actions in the
+        given order, and returns the best one together with its value.
+        Searches that prune may start from a root alpha bound, in which case
+        a value <= alpha is only an upper bound.  Subclasses implement this.
+        """
+        util.raiseNotDefined()
+
+    def getPool(self, layout):
+        if self.pool is None or self.poolLayoutText != layout.layoutText:
+            self.shutdownPool()
+            worker = copy.copy(self)
+            worker.parallel = 1
+            worker.pool = None
+            worker.sharedAlpha = None
+            if self.transpositionTable is not None:
+                worker.transpositionTable = TranspositionTable(
+                    self.transpositionTable.maxSize, self.transpositionTable.policy)
+            self.sharedAlpha = multiprocessing.Value('d', -float('inf'))
+            self.pool = ProcessPoolExecutor(self.parallel, initializer=_initParallelWorker,
+                                            initargs=(worker, layout, self.sharedAlpha))
+            self.poolLayoutText = layout.layoutText
+        return self.pool
+
+    def shutdownPool(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def rootOrder(self, gameState, actions):
+        """
+        The root actions in the order searchRoot tries them.  Agents that
+        reorder moves override this so parallel search breaks ties the same way.
+        """
+        return actions
+
+    def searchRootParallel(self, gameState, depth, actions):
+        """
+        Splits the root actions over the worker pool and combines the results
+        exactly as searchRoot would: the first action, in rootOrder, with the
+        highest value.  The principal variation the winning worker found
+        becomes this agent's.
+        """
+        pool = self.getPool(gameState.data.layout)
+        self.sharedAlpha.value = -float('inf')
+        encoding = gameState.getCompactEncoding()
+        actions = self.rootOrder(gameState, actions)
+        futures = [pool.submit(_parallelRootValue, encoding, depth, action, self.deadline)
+                   for action in actions]
+        results = []
+        variations = []
+        for future in futures:
+            v, alpha, nodes, variation = future.result()
+            if hasattr(self, 'nodesExpanded'):
+                self.nodesExpanded += nodes
+            results.append((v, alpha))
+            variations.append(variation)
+
+        # A value is exact unless the search was cut off against a sibling's
+        # bound (v <= alpha), in which case the true value is at most alpha.
+        best = max([v for v, alpha in results if v > alpha or alpha == -float('inf')] + [-float('inf')])
+        for action, (v, alpha), variation in zip(actions, results, variations):
+            if v <= alpha and alpha != -float('inf'):
+                if alpha < best:
+                    continue
+                # It may tie with the best; settle it as the serial search would
+                v = self.searchRoot(gameState, depth, [action])[1]
+                variation = getattr(self, 'principalVariation', None)
+            if v == best:
+                if variation is not None:
+                    self.principalVariation = variation
+                return action, best
+        return actions[0], best
+
+    def searchAction(self, gameState):
+        actions = gameState.getLegalActions(0)
+        search = self.searchRoot if self.parallel <= 1 else self.searchRootParallel
+        if not self.anytime:
+            if self.transpositionTable is not None:
+                self.transpositionTable.clear()
+            return search(gameState, self.depth, actions)[0]
+
+        startTime = time.time()
+        self.deadline = startTime + self.moveBudget(gameState)
+        best = actions[0]
+        depth = 0
+        try:
+            while depth < self.MAX_ANYTIME_DEPTH:
+                best = search(gameState, depth + 1, actions)[0]
+                actions = [best] + [a for a in actions if a != best]
+                depth += 1
+        except SearchTimeout:
+            pass
+        finally:
+            self.deadline = None
+            self.timeUsed += time.time() - startTime
+        self.depthsReached.append(depth)
+        return best
+
+    def final(self, state):
+        self.shutdownPool()
+        if self.transpositionTable is not None:
+            print(self.transpositionTable)
+        if self.depthsReached:
+            print('Anytime search reached depth %.1f on average (min %d, max %d)' % (
+                float(sum(self.depthsReached)) / len(self.depthsReached),
+                min(self.depthsReached), max(self.depthsReached)))
 
 
 class MinimaxAgent(MultiAgentSearchAgent):
@@ -150,10 +458,20 @@ class MinimaxAgent(MultiAgentSearchAgent):
         Returns whether or not the game state is a losing state
         """
         "*** YOUR CODE HERE ***"
+        return self.searchAction(gameState)
+
+    def searchRoot(self, gameState: GameState, depth, actions, alpha=-float('inf')):
+        """
+        Returns the minimax action for a search depth rounds deep, trying the
+        root actions in the given order.
+        """
         MOD = gameState.getNumAgents()
-        depth = self.depth
+        table = self.transpositionTable
+        deadline = self.deadline
 
         def value(state: GameState, agent_index, cur_depth):
+            if deadline is not None and time.time() > deadline:
+                raise SearchTimeout()
             if state.isWin() or state.isLose() or cur_depth > depth:
                 return self.evaluationFunction(state)
             if agent_index == 0:
@@ -161,14 +479,25 @@ class MinimaxAgent(MultiAgentSearchAgent):
             return min_value(state, agent_index, cur_depth)
 
         def max_value(state: GameState, agent_index, cur_depth):
+            if table is not None:
+                entry = table.lookup(state, agent_index, depth - cur_depth)
+                if entry is not None:
+                    return entry[0]
             res = -float('inf')
             actions = state.getLegalActions(agent_index)
             successors = [state.generateSuccessor(agent_index, action) for action in actions]
             for successor in successors:
                 res = max(value(successor, (agent_index + 1) % MOD, cur_depth), res)
+            if table is not None:
+                table.store(state, agent_index, depth - cur_depth, res)
             return res
 
         def min_value(state: GameState, agent_index, cur_depth):
+            remaining = depth - cur_depth
+            if table is not None:
+                entry = table.lookup(state, agent_index, remaining)
+                if entry is not None:
+                    return entry[0]
             res = float('inf')
             actions = state.getLegalActions(agent_index)
             successors = [state.generateSuccessor(agent_index, action) for action in actions]
@@ -176,75 +505,246 @@ class MinimaxAgent(MultiAgentSearchAgent):
                 cur_depth += 1
             for successor in successors:
                 res = min(value(successor, (agent_index + 1) % MOD, cur_depth), res)
+            if table is not None:
+                table.store(state, agent_index, remaining, res)
             return res
 
-        actions = gameState.getLegalActions(0)
         opt_action = actions[0]
         res = -float('inf')
         for action in actions:
             successor = gameState.generateSuccessor(0, action)
-            if res < value(successor, 1, 1):
+            v = value(successor, 1, 1)
+            if res < v:
                 opt_action = action
-                res = value(successor, 1, 1)
-        return opt_action
+                res = v
+        return opt_action, res
 
 
 class AlphaBetaAgent(MultiAgentSearchAgent):
     """
     Your minimax agent with alpha-beta pruning (question 3)
+
+    Pruning depends on the order moves are tried in.  Passing ordering as a
+    '+'-separated list (e.g. -a ordering=pv+killer+history) tries moves by,
+    in priority order:
+
+      pv       the principal variation of the previous search
+      killer   the last two moves that caused a cutoff at the same ply
+      history  how often (weighted by depth) a move caused a cutoff
+      static   the evaluation function applied to each successor
+
+    The default 'none' keeps getLegalActions order.  nodesExpanded counts the
+    nodes whose successors were generated in the current game; pass
+    stats=True to have final() print the total.
     """
+    ORDERINGS = ('pv', 'killer', 'history', 'static')
+
+    def __init__(self, ordering='none', stats='False', **args):
+        MultiAgentSearchAgent.__init__(self, **args)
+        self.stats = str(stats) == 'True'
+        self.ordering = [] if ordering == 'none' else ordering.split('+')
+        for name in self.ordering:
+            if name not in self.ORDERINGS:
+                raise Exception('Unknown move ordering: ' + name)
+        self.killers = {}  # ply -> up to two actions, most recent first
+        self.history = util.Counter()  # (agent, position, action) -> weight
+        self.principalVariation = {}  # (state hash, agent) -> action
+        self.nodesExpanded = 0
+        self.movesSearched = 0
+
+    def registerInitialState(self, gameState: GameState):
+        MultiAgentSearchAgent.registerInitialState(self, gameState)
+        # Start each game with no move-ordering knowledge, so its node counts
+        # do not depend on the games played before it
+        self.killers = {}
+        self.history = util.Counter()
+        self.principalVariation = {}
+        self.nodesExpanded = 0
+        self.movesSearched = 0
 
     def getAction(self, gameState: GameState):
         """
         Returns the minimax action using self.depth and self.evaluationFunction
         """
         "*** YOUR CODE HERE ***"
+        self.movesSearched += 1
+        return self.searchAction(gameState)
+
+    def orderMoves(self, state: GameState, agent_index, ply, actions):
+        """
+        Returns (action, successor) pairs, best first for the agent to move.
+        successor is None unless static ordering already had to generate it.
+        """
+        if not self.ordering:
+            return [(action, None) for action in actions]
+        pvMove = None
+        if 'pv' in self.ordering:
+            pvMove = self.principalVariation.get((hash(state), agent_index))
+        killers = self.killers.get(ply, []) if 'killer' in self.ordering else []
+        position = state.getPacmanPosition() if agent_index == 0 else state.getGhostPosition(agent_index)
+        sign = 1 if agent_index == 0 else -1
+        scored = []
+        for action in actions:
+            successor = None
+            static = 0
+            if 'static' in self.ordering:
+                successor = state.generateSuccessor(agent_index, action)
+                static = sign * self.evaluationFunction(successor)
+            killer = len(killers) - killers.index(action) if action in killers else 0
+            history = self.history[(agent_index, position, action)] if 'history' in self.ordering else 0
+            scored.append(((action == pvMove, killer, history, static), action, successor))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [(action, successor) for key, action, successor in scored]
+
+    def rootOrder(self, gameState: GameState, actions):
+        return [action for action, successor in self.orderMoves(gameState, 0, 0, actions)]
+
+    def recordCutoff(self, state: GameState, agent_index, ply, remaining, action):
+        if 'killer' in self.ordering:
+            killers = self.killers.setdefault(ply, [])
+            if action in killers:
+                killers.remove(action)
+            killers.insert(0, action)
+            del killers[2:]
+        if 'history' in self.ordering:
+            position = state.getPacmanPosition() if agent_index == 0 else state.getGhostPosition(agent_index)
+            self.history[(agent_index, position, action)] += (remaining + 1) ** 2
+
+    def searchRoot(self, gameState: GameState, depth, actions, alpha=-float('inf')):
+        """
+        Returns the alpha-beta action for a search depth rounds deep, trying the
+        root actions in the given order.
+        """
         MOD = gameState.getNumAgents()
-        depth = self.depth
+        table = self.transpositionTable
+        deadline = self.deadline
+        bestMoves = {} if 'pv' in self.ordering else None
 
         def value(state: GameState, agent_index, cur_depth, a, b):
+            if deadline is not None and time.time() > deadline:
+                raise SearchTimeout()
             if state.isWin() or state.isLose() or cur_depth > depth:
                 return self.evaluationFunction(state)
             if agent_index == 0:
                 return max_value(state, agent_index, cur_depth, a, b)
             return min_value(state, agent_index, cur_depth, a, b)
 
+        def probe(state: GameState, agent_index, remaining, a, b):
+            """
+            Returns a stored value that settles this node for the window
+            (a, b), or None if the node has to be searched.
+            """
+            entry = table.lookup(state, agent_index, remaining)
+            if entry is None:
+                return None
+            v, flag = entry
+            if flag == TranspositionTable.EXACT:
+                return v
+            if flag == TranspositionTable.LOWER and v > b:
+                return v
+            if flag == TranspositionTable.UPPER and v < a:
+                return v
+            return None
+
+        def record(state: GameState, agent_index, remaining, a, b, res):
+            if res <= a:
+                flag = TranspositionTable.UPPER
+            elif res >= b:
+                flag = TranspositionTable.LOWER
+            else:
+                flag = TranspositionTable.EXACT
+            table.store(state, agent_index, remaining, res, flag)
+
         def max_value(state: GameState, agent_index, cur_depth, a, b):
+            remaining = depth - cur_depth
+            if table is not None:
+                v = probe(state, agent_index, remaining, a, b)
+                if v is not None:
+                    return v
+            self.nodesExpanded += 1
+            ply = (cur_depth - 1) * MOD + agent_index
+            a0 = a
             res = -float('inf')
-            actions = state.getLegalActions(agent_index)
-            for action in actions:
-                successor = state.generateSuccessor(agent_index, action)
-                res = max(value(successor, (agent_index + 1) % MOD, cur_depth, a, b), res)
+            best = None
+            for action, successor in self.orderMoves(state, agent_index, ply, state.getLegalActions(agent_index)):
+                if successor is None:
+                    successor = state.generateSuccessor(agent_index, action)
+                v = value(successor, (agent_index + 1) % MOD, cur_depth, a, b)
+                if v > res:
+                    res, best = v, action
                 if res > b:
-                    return res
+                    self.recordCutoff(state, agent_index, ply, remaining, action)
+                    break
                 a = max(a, res)
+            if table is not None:
+                record(state, agent_index, remaining, a0, b, res)
+            if bestMoves is not None:
+                bestMoves[(hash(state), agent_index)] = best
             return res
 
         def min_value(state: GameState, agent_index, cur_depth, a, b):
+            remaining = depth - cur_depth
+            if table is not None:
+                v = probe(state, agent_index, remaining, a, b)
+                if v is not None:
+                    return v
+            self.nodesExpanded += 1
+            ply = (cur_depth - 1) * MOD + agent_index
+            b0 = b
             res = float('inf')
+            best = None
             actions = state.getLegalActions(agent_index)
             if agent_index == MOD - 1:
                 cur_depth += 1
-            for action in actions:
-                successor = state.generateSuccessor(agent_index, action)
-                res = min(value(successor, (agent_index + 1) % MOD, cur_depth, a, b), res)
+            for action, successor in self.orderMoves(state, agent_index, ply, actions):
+                if successor is None:
+                    successor = state.generateSuccessor(agent_index, action)
+                v = value(successor, (agent_index + 1) % MOD, cur_depth, a, b)
+                if v < res:
+                    res, best = v, action
                 if res < a:
-                    return res
+                    self.recordCutoff(state, agent_index, ply, remaining, action)
+                    break
                 b = min(b, res)
+            if table is not None:
+                record(state, agent_index, remaining, a, b0, res)
+            if bestMoves is not None:
+                bestMoves[(hash(state), agent_index)] = best
             return res
 
-        actions = gameState.getLegalActions(0)
+        self.nodesExpanded += 1
         opt_action = actions[0]
         res = -float('inf')
-        a = -float('inf')
+        a = alpha
         b = float('inf')
-        for action in actions:
-            successor = gameState.generateSuccessor(0, action)
-            if res < value(successor, 1, 1, a, b):
+        for action, successor in self.orderMoves(gameState, 0, 0, actions):
+            if successor is None:
+                successor = gameState.generateSuccessor(0, action)
+            v = value(successor, 1, 1, a, b)
+            if res < v:
                 opt_action = action
-                res = value(successor, 1, 1, a, b)
+                res = v
                 a = max(a, res)
-        return opt_action
+
+        if bestMoves is not None:
+            # Walk the best replies from the root to keep this search's
+            # principal variation for ordering the next one.
+            self.principalVariation = {(hash(gameState), 0): opt_action}
+            state, agent_index = gameState.generateSuccessor(0, opt_action), 1 % MOD
+            for ply in range(1, depth * MOD):
+                if state.isWin() or state.isLose():
+                    break
+                action = bestMoves.get((hash(state), agent_index))
+                if action is None:
+                    break
+                self.principalVariation[(hash(state), agent_index)] = action
+                state, agent_index = state.generateSuccessor(agent_index, action), (agent_index + 1) % MOD
+        return opt_action, res
+
+    def final(self, state):
+        MultiAgentSearchAgent.final(self, state)
+        if self.stats:
+            print('Alpha-beta expanded %d nodes over %d moves' % (self.nodesExpanded, self.movesSearched))
 
 
 class ExpectimaxAgent(MultiAgentSearchAgent):
@@ -260,10 +760,20 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         legal moves.
         """
         "*** YOUR CODE HERE ***"
+        return self.searchAction(gameState)
+
+    def searchRoot(self, gameState: GameState, depth, actions, alpha=-float('inf')):
+        """
+        Returns the expectimax action for a search depth rounds deep, trying the
+        root actions in the given order.
+        """
         MOD = gameState.getNumAgents()
-        depth = self.depth
+        table = self.transpositionTable
+        deadline = self.deadline
 
         def value(state: GameState, agent_index, cur_depth):
+            if deadline is not None and time.time() > deadline:
+                raise SearchTimeout()
             if state.isWin() or state.isLose() or cur_depth > depth:
                 return self.evaluationFunction(state)
             if agent_index == 0:
@@ -271,14 +781,25 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
             return exp_value(state, agent_index, cur_depth)
 
         def max_value(state: GameState, agent_index, cur_depth):
+            if table is not None:
+                entry = table.lookup(state, agent_index, depth - cur_depth)
+                if entry is not None:
+                    return entry[0]
             res = -float('inf')
             actions = state.getLegalActions(agent_index)
             successors = [state.generateSuccessor(agent_index, action) for action in actions]
             for successor in successors:
                 res = max(value(successor, (agent_index + 1) % MOD, cur_depth), res)
+            if table is not None:
+                table.store(state, agent_index, depth - cur_depth, res)
             return res
 
         def exp_value(state: GameState, agent_index, cur_depth):
+            remaining = depth - cur_depth
+            if table is not None:
+                entry = table.lookup(state, agent_index, remaining)
+                if entry is not None:
+                    return entry[0]
             res = 0
             actions = state.getLegalActions(agent_index)
             successors = [state.generateSuccessor(agent_index, action) for action in actions]
@@ -286,17 +807,20 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
                 cur_depth += 1
             for successor in successors:
                 res += value(successor, (agent_index + 1) % MOD, cur_depth)
-            return res / len(actions)
+            res = res / len(actions)
+            if table is not None:
+                table.store(state, agent_index, remaining, res)
+            return res
 
-        actions = gameState.getLegalActions(0)
         opt_action = actions[0]
         res = -float('inf')
         for action in actions:
             successor = gameState.generateSuccessor(0, action)
-            if res < value(successor, 1, 1):
+            v = value(successor, 1, 1)
+            if res < v:
                 opt_action = action
-                res = value(successor, 1, 1)
-        return opt_action
+                res = v
+        return opt_action, res
 
 
 def betterEvaluationFunction(currentGameState: GameState):
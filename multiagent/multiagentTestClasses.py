@@ -185,9 +185,12 @@ class GradingAgent(Agent):
         random.seed(self.seed)
 
     def getAction(self, state):
-        GameState.getAndResetExplored()
-        studentAction = (self.studentAgent.getAction(state),
-                         len(GameState.getAndResetExplored()))
+        GameState.setExploredTracking('states')
+        try:
+            studentAction = (self.studentAgent.getAction(state),
+                             len(GameState.getAndResetExplored()))
+        finally:
+            GameState.setExploredTracking(None)
         optimalActions = self.optimalActions[self.stepCount]
         altDepthActions = self.altDepthActions[self.stepCount]
         partialPlyBugActions = self.partialPlyBugActions[self.stepCount]
@@ -295,11 +298,14 @@ class PolyAgent(Agent):
 
     def getAction(self, state):
         # survey agents
-        GameState.getAndResetExplored()
+        GameState.setExploredTracking('states')
         optimalActionLists = []
-        for agent in self.solutionAgents:
-            optimalActionLists.append((agent.getBestPacmanActions(
-                state)[0], len(GameState.getAndResetExplored())))
+        try:
+            for agent in self.solutionAgents:
+                optimalActionLists.append((agent.getBestPacmanActions(
+                    state)[0], len(GameState.getAndResetExplored())))
+        finally:
+            GameState.setExploredTracking(None)
         alternativeDepthLists = [agent.getBestPacmanActions(
             state)[0] for agent in self.alternativeDepthAgents]
         partialPlyBugLists = [agent.getBestPacmanActions(
@@ -43,6 +43,8 @@ from game import GameStateData
 from game import Game
 from game import Directions
 from game import Actions
+from game import Configuration
+from game import reconstituteGrid
 from util import nearestPoint
 from util import manhattanDistance
 import util
@@ -77,15 +79,39 @@ class GameState:
     # Accessor methods: use these to access state data #
     ####################################################
 
-    # static variable keeps track of which states have had getLegalActions called
-    explored = set()
+    # Instrumentation hook for the autograder.  While tracking is on, every
+    # state passed to or returned by generateSuccessor is recorded; it is off
+    # by default so normal play neither hashes nor retains generated states.
+    exploredMode = None
+    explored = None
+    exploredCount = 0
+
+    def setExploredTracking(mode):
+        """
+        mode is 'states' to record the set of distinct states generated,
+        'count' to only count calls to generateSuccessor, or None to turn
+        tracking off.  Either way the recorded data starts out empty.
+        """
+        if mode not in ('states', 'count', None):
+            raise Exception('Unknown explored tracking mode: ' + str(mode))
+        GameState.exploredMode = mode
+        GameState.explored = set() if mode == 'states' else None
+        GameState.exploredCount = 0
+    setExploredTracking = staticmethod(setExploredTracking)
 
     def getAndResetExplored():
-        tmp = GameState.explored.copy()
-        GameState.explored = set()
+        tmp = GameState.explored if GameState.explored is not None else set()
+        if GameState.explored is not None:
+            GameState.explored = set()
         return tmp
     getAndResetExplored = staticmethod(getAndResetExplored)
 
+    def getAndResetExploredCount():
+        tmp = GameState.exploredCount
+        GameState.exploredCount = 0
+        return tmp
+    getAndResetExploredCount = staticmethod(getAndResetExploredCount)
+
     def getLegalActions(self, agentIndex=0):
         """
         Returns the legal actions for the agent specified.
@@ -107,8 +133,9 @@ class GameState:
         if self.isWin() or self.isLose():
             raise Exception('Can\'t generate a successor of a terminal state.')
 
-        # Copy current state
+        # Copy current state; only the moving agent gets a private AgentState
         state = GameState(self)
+        state.data.copyAgentState(agentIndex)
 
         # Let agent's logic deal with its action's effects on the board
         if agentIndex == 0:  # Pacman is moving
@@ -129,8 +156,11 @@ class GameState:
         # Book keeping
         state.data._agentMoved = agentIndex
         state.data.score += state.data.scoreChange
-        GameState.explored.add(self)
-        GameState.explored.add(state)
+        if GameState.exploredMode is not None:
+            GameState.exploredCount += 1
+            if GameState.explored is not None:
+                GameState.explored.add(self)
+                GameState.explored.add(state)
         return state
 
     def getLegalPacmanActions(self):
@@ -262,6 +292,33 @@ class GameState:
         """
         self.data.initialize(layout, numGhostAgents)
 
+    def getCompactEncoding(self):
+        """
+        Returns a small picklable tuple that, together with the layout,
+        describes this state (see fromCompactEncoding).  Used to hand states
+        to worker processes without pickling the layout every time.
+        """
+        data = self.data
+        agents = tuple((s.configuration.pos, s.configuration.direction, s.scaredTimer)
+                       for s in data.agentStates)
+        return (agents, data.food.packBits(), tuple(data.capsules), data.score, data._win, data._lose)
+
+    def fromCompactEncoding(layout, encoding):
+        agents, food, capsules, score, win, lose = encoding
+        state = GameState()
+        state.initialize(layout, len(agents) - 1)
+        data = state.data
+        for agentState, (pos, direction, scaredTimer) in zip(data.agentStates, agents):
+            agentState.configuration = Configuration(pos, direction)
+            agentState.scaredTimer = scaredTimer
+        data.food = reconstituteGrid(food)
+        data.capsules = list(capsules)
+        data.score = score
+        data._win = win
+        data._lose = lose
+        return state
+    fromCompactEncoding = staticmethod(fromCompactEncoding)
+
 ############################################################################
 #                     THE HIDDEN SECRETS OF PACMAN                         #
 #                                                                          #
@@ -284,11 +341,19 @@ class ClassicGameRules:
         self.timeout = timeout
 
     def newGame(self, layout, pacmanAgent, ghostAgents, display, quiet=False, catchExceptions=False):
+        import textDisplay
         agents = [pacmanAgent] + ghostAgents[:layout.getNumGhosts()]
         initState = GameState()
         initState.initialize(layout, len(ghostAgents))
-        game = Game(agents, display, self, catchExceptions=catchExceptions)
+        # Headless games without exception handling take the fast loop, but
+        # only when every agent has declared itself trusted
+        trusted = not catchExceptions and isinstance(display, textDisplay.NullGraphics) and \
+            all(getattr(agent, 'trustedAgent', False) for agent in agents)
+        game = Game(agents, display, self, catchExceptions=catchExceptions, trustedAgents=trusted)
         game.state = initState
+        for agent in agents:
+            if 'setMoveTimeBudget' in dir(agent):
+                agent.setMoveTimeBudget(self)
         self.initialState = initState.deepCopy()
         self.quiet = quiet
         return game
@@ -379,8 +444,7 @@ class PacmanRules:
         # Eat food
         if state.data.food[x][y]:
             state.data.scoreChange += 10
-            state.data.food = state.data.food.copy()
-            state.data.food[x][y] = False
+            state.data.removeFood(x, y)
             state.data._foodEaten = position
             # TODO: cache numFood?
             numFood = state.getNumFood()
@@ -389,11 +453,11 @@ class PacmanRules:
                 state.data._win = True
         # Eat capsule
         if(position in state.getCapsules()):
-            state.data.capsules.remove(position)
+            state.data.removeCapsule(position)
             state.data._capsuleEaten = position
             # Reset all ghosts' scared timers
             for index in range(1, len(state.data.agentStates)):
-                state.data.agentStates[index].scaredTimer = SCARED_TIME
+                state.data.copyAgentState(index).scaredTimer = SCARED_TIME
     consume = staticmethod(consume)
 
 
@@ -437,8 +501,9 @@ class GhostRules:
     def decrementTimer(ghostState):
         timer = ghostState.scaredTimer
         if timer == 1:
-            ghostState.configuration.pos = nearestPoint(
-                ghostState.configuration.pos)
+            # Configurations are shared between states, so replace, don't edit
+            ghostState.configuration = Configuration(
+                nearestPoint(ghostState.configuration.pos), ghostState.configuration.direction)
         ghostState.scaredTimer = max(0, timer - 1)
     decrementTimer = staticmethod(decrementTimer)
 
@@ -460,9 +525,11 @@ class GhostRules:
     def collide(state, ghostState, agentIndex):
         if ghostState.scaredTimer > 0:
             state.data.scoreChange += 200
+            ghostState = state.data.copyAgentState(agentIndex)
             GhostRules.placeGhost(state, ghostState)
             ghostState.scaredTimer = 0
             # Added for first-person
+            state.data._eaten = state.data._eaten[:]
             state.data._eaten[agentIndex] = True
         else:
             if not state.data._win:
@@ -554,6 +621,8 @@ def readCommand(argv):
                       help='Turns on exception handling and timeouts during games', default=False)
     parser.add_option('--timeout', dest='timeout', type='int',
                       help=default('Maximum length of time an agent can spend computing in a single game'), default=30)
+    parser.add_option('--parallel', dest='parallel', type='int',
+                      help=default('Number of worker processes to play non-training games in (no graphics)'), default=1)
 
     options, otherjunk = parser.parse_args(argv)
     if len(otherjunk) != 0:
@@ -606,6 +675,7 @@ def readCommand(argv):
     args['record'] = options.record
     args['catchExceptions'] = options.catchExceptions
     args['timeout'] = options.timeout
+    args['parallel'] = options.parallel
 
     # Special case: recorded games don't use the runGames method or args structure
     if options.gameToReplay != None:
@@ -672,14 +742,97 @@ def replayGame(layout, actions, display):
     display.finish()
 
 
-def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30):
+class GameResult:
+    """
+    The outcome of a game played in a worker process by runGames.  It keeps
+    the parts of a Game that the summary and callers look at (state,
+    moveHistory, agentTimeout, agentCrashed) plus how long it took.
+    """
+
+    def __init__(self, index, seed, game, wallTime):
+        self.index = index
+        self.seed = seed
+        self.state = game.state
+        self.moveHistory = game.moveHistory
+        self.numMoves = len([1 for agentIndex, action in game.moveHistory if agentIndex == 0])
+        self.agentTime = game.totalAgentTimes[0]
+        self.wallTime = wallTime
+        self.agentTimeout = game.agentTimeout
+        self.agentCrashed = game.agentCrashed
+
+
+_gameWorker = {}
+
+
+def _initGameWorker(layout, pacman, ghosts, catchExceptions, timeout):
+    _gameWorker.update(layout=layout, pacman=pacman, ghosts=ghosts,
+                       catchExceptions=catchExceptions, timeout=timeout)
+
+
+def _runGameInWorker(index, seed):
+    import textDisplay
+    random.seed(seed)
+    rules = ClassicGameRules(_gameWorker['timeout'])
+    game = rules.newGame(_gameWorker['layout'], _gameWorker['pacman'], _gameWorker['ghosts'],
+                         textDisplay.NullGraphics(), True, _gameWorker['catchExceptions'])
+    startTime = time.time()
+    game.run()
+    return GameResult(index, seed, game, time.time() - startTime)
+
+
+def runGamesInParallel(layout, pacman, ghosts, first, numGames, catchExceptions, timeout, parallel):
+    """
+    Plays games first..numGames-1 in a pool of worker processes, each with a
+    seed drawn from the current random state so that runs are repeatable
+    with -f.  Prints a line per game as it finishes and returns the
+    GameResults in game order.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    seeds = [random.randrange(2 ** 31) for i in range(first, numGames)]
+    results = []
+    with ProcessPoolExecutor(parallel, initializer=_initGameWorker,
+                             initargs=(layout, pacman, ghosts, catchExceptions, timeout)) as pool:
+        futures = [pool.submit(_runGameInWorker, i, seed) for i, seed in zip(range(first, numGames), seeds)]
+        for future in as_completed(futures):
+            result = future.result()
+            print('Game %d/%d: %s, score %d, %d moves, agent time %.2fs, wall time %.2fs' % (
+                result.index + 1, numGames, ['Loss', 'Win'][int(result.state.isWin())],
+                result.state.getScore(), result.numMoves, result.agentTime, result.wallTime))
+            sys.stdout.flush()
+            results.append(result)
+    results.sort(key=lambda result: result.index)
+    return results
+
+
+def recordGame(layout, moveHistory, i):
+    import time
+    import pickle
+    fname = ('recorded-game-%d' % (i + 1)) + \
+        '-'.join([str(t) for t in time.localtime()[1:6]])
+    f = open(fname, 'wb')
+    components = {'layout': layout, 'actions': moveHistory}
+    pickle.dump(components, f)
+    f.close()
+
+
+def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, catchExceptions=False, timeout=30,
+             parallel=1):
+    """
+    Plays numGames games and prints a summary of the non-training ones.
+
+    With parallel > 1 the training games are still played here, one after
+    another, so that learning agents carry what they learnt into the rest;
+    the remaining games are spread over that many worker processes without
+    graphics, and GameResult objects stand in for their Games.
+    """
     import __main__
     __main__.__dict__['_display'] = display
 
     rules = ClassicGameRules(timeout)
     games = []
 
-    for i in range(numGames):
+    numSerial = numGames if parallel <= 1 else min(numTraining, numGames)
+    for i in range(numSerial):
         beQuiet = i < numTraining
         if beQuiet:
                 # Suppress output and graphics
@@ -696,14 +849,15 @@ def runGames(layout, pacman, ghosts, display, numGames, record, numTraining=0, c
             games.append(game)
 
         if record:
-            import time
-            import pickle
-            fname = ('recorded-game-%d' % (i + 1)) + \
-                '-'.join([str(t) for t in time.localtime()[1:6]])
-            f = file(fname, 'w')
-            components = {'layout': layout, 'actions': game.moveHistory}
-            pickle.dump(components, f)
-            f.close()
+            recordGame(layout, game.moveHistory, i)
+
+    if numSerial < numGames:
+        results = runGamesInParallel(layout, pacman, ghosts, numSerial, numGames,
+                                     catchExceptions, timeout, parallel)
+        for result in results:
+            if record:
+                recordGame(layout, result.moveHistory, result.index)
+        games += results
 
     if (numGames-numTraining) > 0:
         scores = [game.state.getScore() for game in games]
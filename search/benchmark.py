@@ -0,0 +1,278 @@
+# benchmark.py
+# ------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+#
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Runs the search algorithms in search.py over a seeded batch of eight
+puzzles and maze problems and reports, for every run, the path cost, nodes
+expanded, peak frontier size, peak resident memory and wall time as CSV or
+JSON, so results can be compared from one commit to the next.
+
+> python benchmark.py -n 10 --format json -o results.json
+
+Each run happens in its own process, so a run that takes longer than
+--timeout can be stopped.  The search is run twice there: once bare for the
+time, nodes expanded and memory, then again with a
+search.FrontierObserver for peakFrontier, so the observer neither slows
+the timed run nor adds to its memory.  The timed result is sent back before
+the rerun starts, and each of the two gets its own --timeout: a rerun that
+runs out only leaves peakFrontier empty.
+
+peakRSSKB is how far the run's resident memory rose above where it stood
+once its problem was built: the memory the search itself needed, without
+the harness, the modules and the pattern database every run shares.  A
+forked process starts out with its parent's resident set and peak, so the
+peak is reset through /proc/self/clear_refs and read back as VmHWM; where
+that is not available (outside Linux) the column is left empty.  Shared
+pages the run writes to are copied and counted, so even the smallest run
+shows a few hundred kilobytes.
+"""
+
+import csv
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+import eightpuzzle
+import layout
+import pacman
+import search
+import searchAgents
+
+ALGORITHMS = ['dfs', 'bfs', 'ucs', 'astar', 'bidi', 'jps', 'idastar', 'smastar']
+
+# Runs fork where possible, so they inherit the pattern database built up
+# front instead of each building their own.
+if 'fork' in multiprocessing.get_all_start_methods():
+    processes = multiprocessing.get_context('fork')
+else:
+    processes = multiprocessing
+
+FIELDS = ['kind', 'instance', 'algorithm', 'status', 'pathCost', 'expanded',
+          'peakFrontier', 'peakRSSKB', 'seconds']
+
+
+def makeInstances(number, seed, layouts, moves, size):
+    """
+    Returns (kind, name, spec) for number puzzles and number maze problems.
+    The same seed always gives the same instances.
+    """
+    instances = []
+    for i in range(number):
+        random.seed(seed + i)
+        puzzle = eightpuzzle.createRandomEightPuzzle(moves, size)
+        numbers = [puzzle.tileAt(cell) for cell in range(size * size)]
+        instances.append(('puzzle', 'puzzle%d' % i, numbers))
+    rng = random.Random(seed)
+    for i in range(number):
+        layoutName = layouts[i % len(layouts)]
+        cells = layout.getLayout(layoutName).walls.asList(False)
+        start, goal = rng.choice(cells), rng.choice(cells)
+        instances.append(('maze', '%s%d' % (layoutName, i), (layoutName, start, goal)))
+    return instances
+
+
+def makeProblem(kind, spec):
+    "Builds a fresh problem and the heuristic to use with it."
+    if kind == 'puzzle':
+        return eightpuzzle.EightPuzzleSearchProblem(eightpuzzle.EightPuzzleState(spec)), \
+            eightpuzzle.patternDatabaseHeuristic
+    layoutName, start, goal = spec
+    state = pacman.GameState()
+    state.initialize(layout.getLayout(layoutName), 0)
+    problem = searchAgents.PositionSearchProblem(state, start=start, goal=goal, warn=False, visualize=False)
+    return problem, searchAgents.manhattanHeuristic
+
+
+def supports(algorithm, problem):
+    "Whether an algorithm can run on a problem at all."
+    if algorithm == 'bidi':
+        return search.isReversible(problem)
+    if algorithm == 'jps':
+        return 'walls' in dir(problem)
+    return True
+
+
+def memoryStatusKB():
+    """
+    Returns (resident, peak resident) kilobytes for this process from
+    /proc/self/status, or None where there is no such file.
+    """
+    try:
+        with open('/proc/self/status') as status:
+            fields = dict(line.split(':', 1) for line in status if ':' in line)
+        return int(fields['VmRSS'].split()[0]), int(fields['VmHWM'].split()[0])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def resetPeakMemory():
+    """
+    Resets this process's peak resident size to its current size, dropping
+    the peak a forked process inherits from its parent.  Returns the
+    current resident kilobytes, or None if the peak cannot be reset.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clearRefs:
+            clearRefs.write('5')
+    except OSError:
+        return None
+    status = memoryStatusKB()
+    return status[0] if status is not None else None
+
+
+def solve(function, problem, heuristic):
+    if 'heuristic' in function.__code__.co_varnames:
+        return function(problem, heuristic=heuristic)
+    return function(problem)
+
+
+def runInProcess(kind, spec, algorithm, connection):
+    function = getattr(search, algorithm)
+    problem, heuristic = makeProblem(kind, spec)
+    startKB = resetPeakMemory()
+    startTime = time.perf_counter()
+    path = solve(function, problem, heuristic)
+    seconds = time.perf_counter() - startTime
+    peakKB = None
+    status = memoryStatusKB()
+    if startKB is not None and status is not None:
+        peakKB = status[1] - startKB
+
+    connection.send({'status': 'ok' if path is not None else 'no path',
+                     'pathCost': problem.getCostOfActions(path) if path is not None else None,
+                     'expanded': problem._expanded,
+                     'peakRSSKB': peakKB,
+                     'seconds': round(seconds, 6)})
+
+    # The frontier is measured by a second, observed run, so that the
+    # observer's overhead stays out of the timing above
+    frontier = search.FrontierObserver()
+    search.setSearchObserver(frontier)
+    solve(function, *makeProblem(kind, spec))
+    search.setSearchObserver(None)
+    connection.send({'peakFrontier': frontier.peak})
+    connection.close()
+
+
+def receive(receiver, timeout):
+    """
+    The next message from receiver within timeout seconds, 'timeout' if
+    none comes or 'error' if the sender died first.
+    """
+    if not receiver.poll(timeout):
+        return 'timeout'
+    try:
+        return receiver.recv()
+    except EOFError:
+        return 'error'
+
+
+def runOne(kind, spec, algorithm, timeout):
+    """
+    Runs one search in a fresh process.  The measured run and the observed
+    rerun that finds peakFrontier each get timeout seconds; a rerun that
+    runs out only leaves peakFrontier empty.
+    """
+    receiver, sender = processes.Pipe(duplex=False)
+    process = processes.Process(target=runInProcess, args=(kind, spec, algorithm, sender))
+    process.start()
+    sender.close()
+    result = receive(receiver, timeout)
+    if result in ('timeout', 'error'):
+        result = {'status': result}
+    else:
+        frontier = receive(receiver, timeout)
+        if frontier not in ('timeout', 'error'):
+            result.update(frontier)
+    if process.is_alive():
+        process.terminate()
+    process.join()
+    return result
+
+
+def runBenchmark(instances, algorithms, timeout, progress=None):
+    rows = []
+    for kind, name, spec in instances:
+        problem, heuristic = makeProblem(kind, spec)
+        for algorithm in algorithms:
+            row = dict((field, None) for field in FIELDS)
+            row.update({'kind': kind, 'instance': name, 'algorithm': algorithm})
+            if supports(algorithm, problem):
+                row.update(runOne(kind, spec, algorithm, timeout))
+            else:
+                row['status'] = 'unsupported'
+            rows.append(row)
+            if progress is not None:
+                progress.write('%s %s: %s\n' % (name, algorithm, row['status']))
+    return rows
+
+
+def writeResults(rows, format, out):
+    if format == 'json':
+        json.dump(rows, out, indent=2)
+        out.write('\n')
+    else:
+        writer = csv.DictWriter(out, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+
+def readCommand(argv):
+    from optparse import OptionParser
+    parser = OptionParser('python benchmark.py <options>')
+    parser.add_option('-n', '--number', dest='number', type='int', default=5,
+                      help='the number of puzzles, and of mazes, to generate [Default: %default]')
+    parser.add_option('-s', '--seed', dest='seed', type='int', default=0,
+                      help='the random seed the instances are generated from [Default: %default]')
+    parser.add_option('-l', '--layouts', dest='layouts', default='mediumMaze,bigMaze,openMaze',
+                      help='comma-separated layouts to draw mazes from [Default: %default]')
+    parser.add_option('-m', '--moves', dest='moves', type='int', default=30,
+                      help='the number of random moves that scramble each puzzle [Default: %default]')
+    parser.add_option('--size', dest='size', type='int', default=3,
+                      help='3 for eight puzzles, 4 for 15-puzzles [Default: %default]')
+    parser.add_option('-a', '--algorithms', dest='algorithms', default=','.join(ALGORITHMS),
+                      help='comma-separated search functions to run [Default: %default]')
+    parser.add_option('-t', '--timeout', dest='timeout', type='float', default=60,
+                      help='seconds before a run is stopped [Default: %default]')
+    parser.add_option('-f', '--format', dest='format', default='csv', choices=['csv', 'json'],
+                      help='csv or json [Default: %default]')
+    parser.add_option('-o', '--output', dest='output', default=None,
+                      help='the file to write results to [Default: standard output]')
+    parser.add_option('-q', '--quiet', action='store_true', dest='quiet', default=False,
+                      help='do not report progress on standard error')
+    options, otherjunk = parser.parse_args(argv)
+    if len(otherjunk) != 0:
+        raise Exception('Command line input not understood: ' + str(otherjunk))
+    for algorithm in options.algorithms.split(','):
+        if algorithm not in dir(search):
+            raise Exception(algorithm + ' is not a search function in search.py.')
+    return options
+
+
+if __name__ == '__main__':
+    options = readCommand(sys.argv[1:])
+    # Built here, before the runs fork, so no run pays for it.
+    eightpuzzle.getPatternDatabase(options.size)
+    instances = makeInstances(options.number, options.seed, options.layouts.split(','),
+                              options.moves, options.size)
+    rows = runBenchmark(instances, options.algorithms.split(','), options.timeout,
+                        None if options.quiet else sys.stderr)
+    if options.output is None:
+        writeResults(rows, options.format, sys.stdout)
+    else:
+        with open(options.output, 'w', newline='') as out:
+            writeResults(rows, options.format, out)
@@ -0,0 +1,298 @@
+# distanceCalculator.py
+# ---------------------
+# Licensing Information:  You are free to use or extend these projects for
+# educational purposes provided that (1) you do not distribute or publish
+# solutions, (2) you retain this notice, and (3) you provide clear
+# attribution to UC Berkeley, including a link to http://ai.berkeley.edu.
+# 
+# Attribution Information: The Pacman AI projects were developed at UC Berkeley.
+# The core projects and autograders were primarily created by John DeNero
+# (denero@cs.berkeley.edu) and Dan Klein (klein@cs.berkeley.edu).
+# Student side autograding was added by Brad Miller, Nick Hay, and
+# Pieter Abbeel (pabbeel@cs.berkeley.edu).
+
+
+"""
+Maze distances for the search project, computed once per wall grid and
+shared by every problem and heuristic on those walls.
+
+Example:
+distances = getMazeDistances(gameState.getWalls())
+distances.getDistance( (1,1), (10,10) )
+
+MazeDistances holds the all-pairs distance matrix, and CellGraph the
+numbered open cells and their neighbours that the cell searches in
+search.py run on.
+"""
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import array, hashlib, os, tempfile
+
+UNREACHABLE = 1000000000
+
+# Distance matrices are saved here as <wall grid hash>.npy and memory-mapped
+# back in by later processes, so workers on the same layout share one copy.
+# The PACMAN_DISTANCE_CACHE environment variable picks the directory, and
+# setting it empty (or this to None) keeps everything in memory; by default
+# it is pacman-distances in the user's cache directory.  The directory is
+# only used if it belongs to this user and nobody else can write to it.
+# Needs NumPy.
+DISTANCE_CACHE_DIR = os.environ.get('PACMAN_DISTANCE_CACHE', os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'pacman-distances')) or None
+
+mazeDistancesMap = {}
+
+def getMazeDistances(walls):
+    """
+    Returns the MazeDistances for a wall grid, computing it the first time
+    those walls are seen.  Later problems and games on the same walls share
+    the result.
+    """
+    if walls not in mazeDistancesMap:
+        mazeDistancesMap[walls] = MazeDistances(walls)
+    return mazeDistancesMap[walls]
+
+class MazeDistances:
+    """
+    All-pairs maze distances for one wall grid.  Open cells are numbered in
+    walls.asList(False) order, and the distances live in a cells x cells
+    matrix of the narrowest unsigned type that fits: a NumPy array when NumPy
+    is installed (read-only and memory-mapped if it came from
+    DISTANCE_CACHE_DIR), otherwise one array.array row per cell.
+    """
+    def __init__(self, walls):
+        self.cells = walls.asList(False)
+        self.cellIndex = dict((cell, i) for i, cell in enumerate(self.cells))
+        if numpy is not None and DISTANCE_CACHE_DIR is not None:
+            self.matrix = cachedDistanceMatrix(walls, self.cells, self.cellIndex)
+        else:
+            self.matrix = computeDistanceMatrix(walls, self.cells, self.cellIndex)
+
+    def getDistance(self, pos1, pos2):
+        distance = self.matrix[self.cellIndex[pos1]][self.cellIndex[pos2]]
+        if distance >= len(self.cells):
+            return UNREACHABLE
+        return int(distance)
+
+    def getDistancesFrom(self, pos):
+        """
+        Returns the row of distances from pos, indexed like self.cells.
+        Unreachable cells hold len(self.cells).
+        """
+        return self.matrix[self.cellIndex[pos]]
+
+def computeDistanceMatrix(walls, cells, cellIndex):
+    """
+    The cells x cells matrix of maze distances.  Every step costs 1, so each
+    row is a breadth-first search over precomputed neighbour indices.
+    Unreachable pairs hold len(cells).
+    """
+    numCells = len(cells)
+    neighbors = []
+    for x, y in cells:
+        adjacent = ((x, y+1), (x, y-1), (x+1, y), (x-1, y))
+        neighbors.append([cellIndex[other] for other in adjacent if other in cellIndex])
+    rows = []
+    for source in range(numCells):
+        dist = [numCells] * numCells
+        dist[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            nextFrontier = []
+            for node in frontier:
+                for other in neighbors[node]:
+                    if dist[other] == numCells:
+                        dist[other] = depth
+                        nextFrontier.append(other)
+            frontier = nextFrontier
+        rows.append(dist)
+    dtype, typecode = distanceTypes(numCells)
+    if numpy is not None:
+        return numpy.array(rows, dtype=dtype).reshape(numCells, numCells)
+    return [array.array(typecode, row) for row in rows]
+
+def distanceTypes(numCells):
+    "The (NumPy dtype, array typecode) of a distance matrix over numCells cells."
+    if numCells < 1 << 8:
+        return 'uint8', 'B'
+    if numCells < 1 << 16:
+        return 'uint16', 'H'
+    return 'uint32', 'L'
+
+def wallsHash(walls):
+    """
+    A hex digest of a wall grid's size and contents, used to name its file
+    in DISTANCE_CACHE_DIR.
+    """
+    digest = hashlib.sha1(('%d,%d:' % (walls.width, walls.height)).encode())
+    digest.update(bytes(bytearray(1 if wall else 0 for column in walls.data for wall in column)))
+    return digest.hexdigest()
+
+def cacheDirectory():
+    """
+    DISTANCE_CACHE_DIR, created with mode 0700 if it is missing, or None if
+    it cannot be created or is not a directory that this user owns and
+    nobody else can write to.
+    """
+    try:
+        os.makedirs(DISTANCE_CACHE_DIR, mode=0o700, exist_ok=True)
+        status = os.stat(DISTANCE_CACHE_DIR)
+    except OSError:
+        return None
+    if 'getuid' in dir(os) and status.st_uid != os.getuid():
+        return None
+    if status.st_mode & 0o022:
+        return None
+    return DISTANCE_CACHE_DIR
+
+def isDistanceMatrix(matrix, cells, cellIndex):
+    """
+    Whether a loaded matrix could be the distance matrix of these cells: the
+    right shape and dtype, zero on the diagonal, symmetric, with nothing
+    past the unreachable value and 1 between neighbouring cells.  Catches
+    stale and corrupt files, not deliberately forged ones.
+    """
+    numCells = len(cells)
+    if matrix.shape != (numCells, numCells) or matrix.dtype != numpy.dtype(distanceTypes(numCells)[0]):
+        return False
+    if numCells == 0:
+        return True
+    if matrix.diagonal().any() or (matrix > numCells).any() or not (matrix == matrix.T).all():
+        return False
+    for i, (x, y) in enumerate(cells):
+        for other in ((x, y+1), (x+1, y)):
+            if other in cellIndex and matrix[i, cellIndex[other]] != 1:
+                return False
+    return True
+
+def cachedDistanceMatrix(walls, cells, cellIndex):
+    """
+    Memory-maps the distance matrix for walls from DISTANCE_CACHE_DIR, or
+    computes it and saves it there for the next process.  Failing to read or
+    write the cache only costs the recomputation, and a file that fails
+    isDistanceMatrix is recomputed and replaced.
+    """
+    directory = cacheDirectory()
+    if directory is None:
+        return computeDistanceMatrix(walls, cells, cellIndex)
+    path = os.path.join(directory, wallsHash(walls) + '.npy')
+    try:
+        matrix = numpy.load(path, mmap_mode='r')
+        if isDistanceMatrix(matrix, cells, cellIndex):
+            return matrix
+    except (OSError, ValueError):
+        pass
+    matrix = computeDistanceMatrix(walls, cells, cellIndex)
+    tmpPath = None
+    try:
+        # Write under a temporary name and rename, so a process loading the
+        # file concurrently never sees it half written.
+        fd, tmpPath = tempfile.mkstemp(suffix='.npy', dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            numpy.save(f, matrix)
+        os.replace(tmpPath, path)
+    except OSError:
+        if tmpPath is not None and os.path.exists(tmpPath):
+            os.remove(tmpPath)
+    return matrix
+
+# The neighbour directions of a CellGraph, in the order
+# PositionSearchProblem.getSuccessors generates them: North, South, East,
+# West.
+CELL_MOVES = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+# breadthFirstLevels expands a level with NumPy once it is this many cells
+# wide; below that the array overhead costs more than a Python loop.
+CELL_VECTOR_WIDTH = 256
+
+cellGraphMap = {}
+
+def getCellGraph(walls):
+    """
+    Returns the CellGraph for a wall grid, building it the first time those
+    walls are seen.
+    """
+    if walls not in cellGraphMap:
+        cellGraphMap[walls] = CellGraph(walls)
+    return cellGraphMap[walls]
+
+class CellGraph:
+    """
+    The open cells of one wall grid, numbered as in MazeDistances, and who
+    neighbours whom.  neighbors[i][k] is the cell one CELL_MOVES[k] step from
+    cell i, or -1 for a wall: a cells x 4 int32 NumPy array when NumPy is
+    installed, otherwise one array.array row per cell.  adjacency[i] holds
+    the same as (neighbour, k) pairs, for loops written in Python.
+    """
+    def __init__(self, walls):
+        self.cells = walls.asList(False)
+        self.cellIndex = dict((cell, i) for i, cell in enumerate(self.cells))
+        rows = [[self.cellIndex.get((x + dx, y + dy), -1) for dx, dy in CELL_MOVES]
+                for x, y in self.cells]
+        self.adjacency = [tuple((other, k) for k, other in enumerate(row) if other >= 0)
+                          for row in rows]
+        if numpy is not None:
+            self.neighbors = numpy.array(rows, dtype=numpy.int32).reshape(len(self.cells), len(CELL_MOVES))
+        else:
+            self.neighbors = [array.array('l', row) for row in rows]
+
+    def newTree(self):
+        """
+        Returns empty (parent, move) arrays for breadthFirstLevels to fill,
+        with -1 for every cell.
+        """
+        return array.array('i', [-1]) * len(self.cells), array.array('b', [-1]) * len(self.cells)
+
+    def breadthFirstLevels(self, start, parent, move):
+        """
+        Generates the levels of a breadth-first search from cell start, one
+        list of cells per level, in the order a FIFO graph search first
+        pushes them.  parent[i] and move[i] are set to the cell and the
+        CELL_MOVES index that reached cell i as it is generated.
+
+        A level of CELL_VECTOR_WIDTH cells or more is expanded with a few
+        NumPy operations on neighbors, working in place on parent and move;
+        narrower levels, which is every level of most Pacman mazes, are
+        cheaper to loop over in Python.
+        """
+        parent[start] = start
+        level = [start]
+        while level:
+            yield level
+            if numpy is not None and len(level) >= CELL_VECTOR_WIDTH:
+                level = self.expandLevel(level, parent, move)
+                continue
+            nextLevel = []
+            for cell in level:
+                for other, k in self.adjacency[cell]:
+                    if parent[other] < 0:
+                        parent[other] = cell
+                        move[other] = k
+                        nextLevel.append(other)
+            level = nextLevel
+
+    def expandLevel(self, level, parent, move):
+        "The NumPy step of breadthFirstLevels."
+        parents = numpy.frombuffer(parent, dtype=numpy.int32)
+        moves = numpy.frombuffer(move, dtype=numpy.int8)
+        level = numpy.array(level, dtype=numpy.int32)
+        children = self.neighbors[level].ravel()
+        fromCells = numpy.repeat(level, len(CELL_MOVES))
+        steps = numpy.tile(numpy.arange(len(CELL_MOVES), dtype=numpy.int8), len(level))
+        keep = children >= 0
+        children, fromCells, steps = children[keep], fromCells[keep], steps[keep]
+        keep = parents[children] < 0
+        children, fromCells, steps = children[keep], fromCells[keep], steps[keep]
+        # A cell reached twice from this level keeps its first push.
+        _, first = numpy.unique(children, return_index=True)
+        first.sort()
+        nextLevel = children[first]
+        parents[nextLevel] = fromCells[first]
+        moves[nextLevel] = steps[first]
+        return nextLevel.tolist()
@@ -14,6 +14,12 @@
 
 import search
 import random
+import collections
+import array
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Module Classes
 
@@ -46,18 +52,44 @@ class EightPuzzleState:
             | 6 | 7 | 8 |
             ------------
 
-        The configuration of the puzzle is stored in a 2-dimensional
-        list (a list of lists) 'cells'.
+        The same constructor builds a 15-puzzle from 16 numbers (0 to 15).
+
+        The configuration is packed into a single int, 'code', with 4 bits
+        per cell: cell i (row-major) holds its number in bits 4i to 4i+3.
+        Moves and hashing are therefore a few integer operations;
+        'cells' rebuilds the 2-dimensional list of lists on demand.
         """
-        self.cells = []
-        numbers = numbers[:] # Make a copy so as not to cause side-effects.
-        numbers.reverse()
-        for row in range( 3 ):
-            self.cells.append( [] )
-            for col in range( 3 ):
-                self.cells[row].append( numbers.pop() )
-                if self.cells[row][col] == 0:
-                    self.blankLocation = row, col
+        size = int(round(len(numbers) ** 0.5))
+        if size * size != len(numbers) or size > 4:
+            raise Exception('A puzzle needs 4, 9 or 16 numbers, not %d' % len(numbers))
+        self.size = size
+        self.code = 0
+        for i, number in enumerate(numbers):
+            self.code |= number << (4 * i)
+            if number == 0:
+                self.blank = i
+
+    @staticmethod
+    def fromCode(size, code, blank):
+        "Builds a puzzle directly from its packed code and blank cell."
+        puzzle = EightPuzzleState.__new__(EightPuzzleState)
+        puzzle.size = size
+        puzzle.code = code
+        puzzle.blank = blank
+        return puzzle
+
+    @property
+    def blankLocation(self):
+        return divmod(self.blank, self.size)
+
+    @property
+    def cells(self):
+        return [[self.tileAt(row * self.size + col) for col in range(self.size)]
+                for row in range(self.size)]
+
+    def tileAt(self, cell):
+        "Returns the number in cell (row-major index), 0 for the blank."
+        return (self.code >> (4 * cell)) & 15
 
     def isGoal( self ):
         """
@@ -77,13 +109,7 @@ class EightPuzzleState:
         >>> EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).isGoal()
         False
         """
-        current = 0
-        for row in range( 3 ):
-            for col in range( 3 ):
-                if current != self.cells[row][col]:
-                    return False
-                current += 1
-        return True
+        return self.code == goalCode(self.size)
 
     def legalMoves( self ):
         """
@@ -99,11 +125,11 @@ class EightPuzzleState:
         row, col = self.blankLocation
         if(row != 0):
             moves.append('up')
-        if(row != 2):
+        if(row != self.size - 1):
             moves.append('down')
         if(col != 0):
             moves.append('left')
-        if(col != 2):
+        if(col != self.size - 1):
             moves.append('right')
         return moves
 
@@ -120,30 +146,21 @@ class EightPuzzleState:
         it returns a new object.
         """
         row, col = self.blankLocation
-        if(move == 'up'):
-            newrow = row - 1
-            newcol = col
-        elif(move == 'down'):
-            newrow = row + 1
-            newcol = col
-        elif(move == 'left'):
-            newrow = row
-            newcol = col - 1
-        elif(move == 'right'):
-            newrow = row
-            newcol = col + 1
+        if(move == 'up' and row != 0):
+            newBlank = self.blank - self.size
+        elif(move == 'down' and row != self.size - 1):
+            newBlank = self.blank + self.size
+        elif(move == 'left' and col != 0):
+            newBlank = self.blank - 1
+        elif(move == 'right' and col != self.size - 1):
+            newBlank = self.blank + 1
         else:
-            raise "Illegal Move"
+            raise Exception("Illegal Move")
 
-        # Create a copy of the current eightPuzzle
-        newPuzzle = EightPuzzleState([0, 0, 0, 0, 0, 0, 0, 0, 0])
-        newPuzzle.cells = [values[:] for values in self.cells]
-        # And update it to reflect the move
-        newPuzzle.cells[row][col] = self.cells[newrow][newcol]
-        newPuzzle.cells[newrow][newcol] = self.cells[row][col]
-        newPuzzle.blankLocation = newrow, newcol
-
-        return newPuzzle
+        # Slide the tile into the blank, whose 4 bits are already zero
+        tile = self.tileAt(newBlank)
+        code = self.code & ~(15 << (4 * newBlank)) | (tile << (4 * self.blank))
+        return EightPuzzleState.fromCode(self.size, code, newBlank)
 
     # Utilities for comparison and display
     def __eq__(self, other):
@@ -155,27 +172,26 @@ class EightPuzzleState:
               EightPuzzleState([1, 0, 2, 3, 4, 5, 6, 7, 8]).result('left')
           True
         """
-        for row in range( 3 ):
-            if self.cells[row] != other.cells[row]:
-                return False
-        return True
+        if not isinstance(other, EightPuzzleState): return False
+        return self.code == other.code and self.size == other.size
 
     def __hash__(self):
-        return hash(str(self.cells))
+        return hash(self.code)
 
     def __getAsciiString(self):
         """
           Returns a display string for the maze
         """
         lines = []
-        horizontalLine = ('-' * (13))
+        width = len(str(self.size * self.size - 1))
+        horizontalLine = ('-' * ((width + 3) * self.size + 1))
         lines.append(horizontalLine)
         for row in self.cells:
             rowLine = '|'
             for col in row:
                 if col == 0:
                     col = ' '
-                rowLine = rowLine + ' ' + col.__str__() + ' |'
+                rowLine = rowLine + ' ' + col.__str__().rjust(width) + ' |'
             lines.append(rowLine)
             lines.append(horizontalLine)
         return '\n'.join(lines)
@@ -189,14 +205,20 @@ class EightPuzzleSearchProblem(search.SearchProblem):
     """
       Implementation of a SearchProblem for the  Eight Puzzle domain
 
-      Each state is represented by an instance of an eightPuzzle.
+      Each state is represented by an instance of an eightPuzzle.  The same
+      problem works for 15-puzzles.
     """
     def __init__(self,puzzle):
         "Creates a new EightPuzzleSearchProblem which stores search information."
         self.puzzle = puzzle
+        self._expanded = 0
 
     def getStartState(self):
-        return puzzle
+        return self.puzzle
+
+    def getGoalState(self):
+        size = self.puzzle.size
+        return EightPuzzleState.fromCode(size, goalCode(size), 0)
 
     def isGoalState(self,state):
         return state.isGoal()
@@ -207,11 +229,28 @@ class EightPuzzleSearchProblem(search.SearchProblem):
           each succesor is either left, right, up, or down
           from the original state and the cost is 1.0 for each
         """
+        self._expanded += 1
         succ = []
         for a in state.legalMoves():
             succ.append((state.result(a), a, 1))
         return succ
 
+    def isReversible(self):
+        "Every move can be undone and there is one goal, so bidirectional search applies."
+        return True
+
+    def getPredecessors(self,state):
+        """
+          Returns (predecessor, action, stepCost) triples: every move can be
+          undone, so each neighbouring puzzle is a predecessor, reached with
+          the opposite move.  Used by search.bidirectionalSearch.
+        """
+        self._expanded += 1
+        pred = []
+        for a in state.legalMoves():
+            pred.append((state.result(a), OPPOSITE_MOVES[a], 1))
+        return pred
+
     def getCostOfActions(self, actions):
         """
          actions: A list of actions to take
@@ -248,20 +287,138 @@ def loadEightPuzzle(puzzleNumber):
     """
     return EightPuzzleState(EIGHT_PUZZLE_DATA[puzzleNumber])
 
-def createRandomEightPuzzle(moves=100):
+def createRandomEightPuzzle(moves=100, size=3):
     """
       moves: number of random moves to apply
+      size: 3 for an eight puzzle, 4 for a 15-puzzle
 
       Creates a random eight puzzle by applying
       a series of 'moves' random moves to a solved
       puzzle.
     """
-    puzzle = EightPuzzleState([0,1,2,3,4,5,6,7,8])
+    puzzle = EightPuzzleState(list(range(size * size)))
     for i in range(moves):
         # Execute a random legal move
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
+OPPOSITE_MOVES = {'up': 'down', 'down': 'up', 'left': 'right', 'right': 'left'}
+
+def goalCode(size):
+    "The packed code of the solved puzzle: number i in cell i."
+    code = 0
+    for i in range(size * size):
+        code |= i << (4 * i)
+    return code
+
+# Disjoint sets of tiles whose pattern database costs add up to an
+# admissible heuristic.
+PATTERN_GROUPS = {3: [(1, 2, 3, 4), (5, 6, 7, 8)],
+                  4: [(1, 2, 3, 4), (5, 6, 7, 8), (9, 10, 11, 12), (13, 14, 15)]}
+
+patternDatabases = {}
+
+def getPatternDatabase(size, groups=None):
+    """
+      Returns the PatternDatabase for a puzzle size, building it the first
+      time it is asked for.  groups defaults to PATTERN_GROUPS[size].
+    """
+    if groups is None:
+        groups = PATTERN_GROUPS[size]
+    key = (size, tuple(tuple(group) for group in groups))
+    if key not in patternDatabases:
+        patternDatabases[key] = PatternDatabase(size, groups)
+    return patternDatabases[key]
+
+class PatternDatabase:
+    """
+      A disjoint pattern database.  For each group of tiles it stores, for
+      every placement of those tiles and of the blank, the fewest moves of
+      those tiles needed to bring them home.  Moves of other tiles are free,
+      so each group's cost only counts its own moves and the costs of the
+      groups add up to a lower bound on the solution length.  Keeping the
+      blank in the index keeps the sum consistent: a real move slides one
+      tile, changing its group's cost by at most one and no other group's.
+
+      Each group's table is a flat array indexed by its tiles' cells and then
+      the blank's cell in base size*size, filled by a breadth-first search
+      backward from the goal; a NumPy uint8 array when NumPy is installed,
+      else array.array.
+    """
+    def __init__(self, size, groups):
+        self.size = size
+        self.groups = [tuple(group) for group in groups]
+        self.tables = [self.buildTable(group) for group in self.groups]
+
+    def buildTable(self, group):
+        """
+          0-1 breadth-first search over (group tile cells, blank cell) from
+          the goal, where sliding a group tile costs 1 and sliding any other
+          tile costs 0.
+        """
+        size, cells, unset = self.size, self.size * self.size, 255
+        numTiles = len(group)
+        places = [cells ** i for i in range(numTiles)]
+        neighbors = []
+        for cell in range(cells):
+            row, col = divmod(cell, size)
+            neighbors.append([r * size + c for r, c in ((row - 1, col), (row + 1, col), (row, col - 1), (row, col + 1))
+                              if 0 <= r < size and 0 <= c < size])
+
+        best = bytearray([unset]) * (cells ** numTiles * cells)
+        start = tuple(group)
+        startIndex = sum(cell * place for cell, place in zip(start, places))
+        best[startIndex * cells] = 0
+        queue = collections.deque([(start, 0, startIndex, 0)])
+        while queue:
+            positions, blank, index, cost = queue.popleft()
+            if best[index * cells + blank] != cost:
+                continue
+            for cell in neighbors[blank]:
+                if cell in positions:
+                    tile = positions.index(cell)
+                    nextPositions = positions[:tile] + (blank,) + positions[tile + 1:]
+                    nextIndex = index + (blank - cell) * places[tile]
+                    nextCost = cost + 1
+                else:
+                    nextPositions, nextIndex, nextCost = positions, index, cost
+                key = nextIndex * cells + cell
+                if best[key] <= nextCost:
+                    continue
+                best[key] = nextCost
+                if nextCost == cost:
+                    queue.appendleft((nextPositions, cell, nextIndex, nextCost))
+                else:
+                    queue.append((nextPositions, cell, nextIndex, nextCost))
+
+        table = array.array('B', best)
+        if numpy is not None:
+            return numpy.frombuffer(table, dtype=numpy.uint8)
+        return table
+
+    def getCost(self, state):
+        "Returns the summed pattern costs of a puzzle state."
+        cells = self.size * self.size
+        where = [0] * cells
+        for cell in range(cells):
+            where[state.tileAt(cell)] = cell
+        total = 0
+        for group, table in zip(self.groups, self.tables):
+            index = 0
+            place = 1
+            for tile in group:
+                index += where[tile] * place
+                place *= cells
+            total += int(table[index * cells + where[0]])
+        return total
+
+def patternDatabaseHeuristic(state, problem=None):
+    """
+      An admissible and consistent heuristic for EightPuzzleSearchProblem
+      from the disjoint pattern database for the puzzle's size.
+    """
+    return getPatternDatabase(state.size).getCost(state)
+
 if __name__ == '__main__':
     puzzle = createRandomEightPuzzle(25)
     print('A random puzzle:')
@@ -197,6 +197,7 @@ class Grid:
 
     def __eq__(self, other):
         if other == None: return False
+        if isinstance(other, BitGrid): return other == self
         return self.data == other.data
 
     def __hash__(self):
@@ -282,6 +283,119 @@ class Grid:
         return bools
 
 
+class BitGrid:
+    """
+    A boolean Grid backed by a single Python int, one bit per cell.  Cell (x,y)
+    lives at bit x * height + y, the same ordering Grid.packBits uses.
+
+    Data is accessed via grid[x][y] exactly as with Grid.  Because ints are
+    immutable, copy() just shares the int and a write replaces it, so copying,
+    hashing, equality and count() are word operations rather than walks over
+    every cell.
+    """
+
+    def __init__(self, width, height, initialValue=False, bits=0):
+        if initialValue not in [False, True]: raise Exception('Grids can only contain booleans')
+        self.width = width
+        self.height = height
+        self._full = (1 << (width * height)) - 1
+        self.bits = self._full if initialValue else bits
+
+    @staticmethod
+    def fromGrid(grid):
+        """
+        Builds a BitGrid holding the same cells as a list-of-lists Grid.
+        """
+        bits = 0
+        index = 0
+        for column in grid.data:
+            for cell in column:
+                if cell:
+                    bits |= 1 << index
+                index += 1
+        return BitGrid(grid.width, grid.height, bits=bits)
+
+    def toGrid(self):
+        g = Grid(self.width, self.height)
+        for x, y in self.asList():
+            g[x][y] = True
+        return g
+
+    def __getitem__(self, x):
+        return _BitGridColumn(self, x)
+
+    def __str__(self):
+        out = [[str(self.get(x, y))[0] for x in range(self.width)] for y in range(self.height)]
+        out.reverse()
+        return '\n'.join([''.join(x) for x in out])
+
+    def __eq__(self, other):
+        if other == None: return False
+        if isinstance(other, Grid): other = BitGrid.fromGrid(other)
+        return self.bits == other.bits and self.width == other.width and self.height == other.height
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def get(self, x, y):
+        return (self.bits >> (x * self.height + y)) & 1 == 1
+
+    def set(self, x, y, value):
+        mask = 1 << (x * self.height + y)
+        if value:
+            self.bits |= mask
+        else:
+            self.bits &= ~mask
+
+    def copy(self):
+        return BitGrid(self.width, self.height, bits=self.bits)
+
+    def deepCopy(self):
+        return self.copy()
+
+    def shallowCopy(self):
+        return self.copy()
+
+    def count(self, item=True):
+        n = bin(self.bits).count('1')
+        if item: return n
+        return self.width * self.height - n
+
+    def asList(self, key=True):
+        bits = self.bits if key else self._full & ~self.bits
+        list = []
+        while bits:
+            low = bits & -bits
+            index = low.bit_length() - 1
+            list.append((index // self.height, index % self.height))
+            bits ^= low
+        return list
+
+    def packBits(self):
+        return self.toGrid().packBits()
+
+
+class _BitGridColumn:
+    """
+    The grid[x] half of a BitGrid lookup; reads and writes go straight through
+    to the parent's bits.
+    """
+    __slots__ = ('grid', 'x')
+
+    def __init__(self, grid, x):
+        self.grid = grid
+        self.x = x
+
+    def __getitem__(self, y):
+        return self.grid.get(self.x, y)
+
+    def __setitem__(self, y, value):
+        self.grid.set(self.x, y, value)
+
+    def __len__(self):
+        return self.grid.height
+
+
 def reconstituteGrid(bitRep):
     if type(bitRep) is not type((1, 2)):
         return bitRep
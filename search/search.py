@@ -17,8 +17,19 @@ In search.py, you will implement generic search algorithms which are called by
 Pacman agents (in searchAgents.py).
 """
 
+import heapq
+import itertools
+import time
 import util
 
+# When True, bestFirstSearch replays the path it returns through
+# problem.getCostOfActions and checks it against the cost it summed from
+# the step costs along the way.
+VALIDATE_PATH_COST = False
+
+# The most search nodes smaStarSearch keeps in memory at once.
+SMA_NODE_BUDGET = 10000
+
 
 class SearchProblem:
     """
@@ -63,6 +74,311 @@ class SearchProblem:
         util.raiseNotDefined()
 
 
+class SearchNode:
+    """
+    A node in the search tree: a state, the node it was reached from, the
+    action that reached it and the cost of the path so far.
+
+    Children point at their parent instead of carrying a copy of the whole
+    action list, so generating a node is O(1); the path is rebuilt with
+    getPath only once a goal is found.
+    """
+    __slots__ = ('state', 'parent', 'action', 'pathCost', 'depth')
+
+    def __init__(self, state, parent=None, action=None, pathCost=0):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.pathCost = pathCost
+        self.depth = 0 if parent is None else parent.depth + 1
+
+    def getPath(self):
+        """
+        Returns the list of actions leading from the root to this node.
+        """
+        path = [None] * self.depth
+        node = self
+        while node.parent is not None:
+            path[node.depth - 1] = node.action
+            node = node.parent
+        return path
+
+
+class SearchObserver:
+    """
+    Receives events from the searches in this file while it is installed
+    with setSearchObserver.  Subclasses override the events they care
+    about; every event is a no-op here.
+
+      push(node, priority)     node entered the frontier (priority is None
+                               for a stack or queue)
+      pop(node)                node left the frontier to be goal tested
+      expand(node, successors) node's successors were generated
+      goal(node)               node is the goal the search returns
+      prune(node)              node was dropped without being expanded: its
+                               state was already expanded, a cheaper path
+                               reached it, it exceeded a cost bound, or it
+                               was forgotten to save memory
+    """
+
+    def push(self, node, priority=None):
+        pass
+
+    def pop(self, node):
+        pass
+
+    def expand(self, node, successors):
+        pass
+
+    def goal(self, node):
+        pass
+
+    def prune(self, node):
+        pass
+
+
+# The observer the searches report to, or None.  Each search reads it once
+# when it starts, and with None installed the only cost is an is-None test
+# per event.
+searchObserver = None
+
+
+def setSearchObserver(observer):
+    """
+    Installs observer (a SearchObserver, or None for no instrumentation) for
+    the searches started from now on.
+    """
+    global searchObserver
+    searchObserver = observer
+
+
+class CountingObserver(SearchObserver):
+    "Counts each kind of event."
+
+    def __init__(self):
+        self.counts = util.Counter()
+
+    def push(self, node, priority=None):
+        self.counts['push'] += 1
+
+    def pop(self, node):
+        self.counts['pop'] += 1
+
+    def expand(self, node, successors):
+        self.counts['expand'] += 1
+        self.counts['generate'] += len(successors)
+
+    def goal(self, node):
+        self.counts['goal'] += 1
+
+    def prune(self, node):
+        self.counts['prune'] += 1
+
+
+class TimingObserver(SearchObserver):
+    """
+    Times the search from its first event to its goal, and keeps a histogram
+    of the time between consecutive expansions: histogram[2 ** k] counts the
+    gaps of under 2 ** k microseconds.
+    """
+
+    def __init__(self):
+        self.startTime = None
+        self.lastExpansion = None
+        self.elapsed = 0.0
+        self.histogram = util.Counter()
+
+    def push(self, node, priority=None):
+        if self.startTime is None:
+            self.startTime = self.lastExpansion = time.perf_counter()
+
+    def expand(self, node, successors):
+        now = time.perf_counter()
+        if self.lastExpansion is not None:
+            bucket = 1
+            while bucket <= (now - self.lastExpansion) * 1e6:
+                bucket *= 2
+            self.histogram[bucket] += 1
+        self.lastExpansion = now
+
+    def goal(self, node):
+        if self.startTime is not None:
+            self.elapsed = time.perf_counter() - self.startTime
+
+
+class FrontierObserver(SearchObserver):
+    """
+    Follows how many nodes are in the frontier.  series holds (expansions so
+    far, frontier size) after every expansion, and peak the largest size.
+    For smaStarSearch the count is the nodes held in memory.
+    """
+
+    def __init__(self):
+        self.queued = set()
+        self.expansions = 0
+        self.peak = 0
+        self.series = []
+
+    def push(self, node, priority=None):
+        self.queued.add(id(node))
+        if len(self.queued) > self.peak:
+            self.peak = len(self.queued)
+
+    def pop(self, node):
+        self.queued.discard(id(node))
+
+    def prune(self, node):
+        self.queued.discard(id(node))
+
+    def expand(self, node, successors):
+        self.expansions += 1
+        self.series.append((self.expansions, len(self.queued)))
+
+
+class StatisticsObserver(SearchObserver):
+    """
+    Runs a CountingObserver, TimingObserver and FrontierObserver together
+    and summarizes them.
+    """
+
+    def __init__(self):
+        self.counter = CountingObserver()
+        self.timer = TimingObserver()
+        self.frontier = FrontierObserver()
+        self.observers = [self.counter, self.timer, self.frontier]
+
+    def push(self, node, priority=None):
+        for observer in self.observers: observer.push(node, priority)
+
+    def pop(self, node):
+        for observer in self.observers: observer.pop(node)
+
+    def expand(self, node, successors):
+        for observer in self.observers: observer.expand(node, successors)
+
+    def goal(self, node):
+        for observer in self.observers: observer.goal(node)
+
+    def prune(self, node):
+        for observer in self.observers: observer.prune(node)
+
+    def summary(self):
+        counts = self.counter.counts
+        lines = ['Search statistics:',
+                 '  pushed %d, popped %d, expanded %d, generated %d, pruned %d' %
+                 (counts['push'], counts['pop'], counts['expand'], counts['generate'], counts['prune']),
+                 '  peak frontier %d nodes, search time %.3f seconds' % (self.frontier.peak, self.timer.elapsed)]
+        if self.timer.histogram:
+            lines.append('  time between expansions:')
+            for bucket in sorted(self.timer.histogram):
+                lines.append('    < %6d us: %d' % (bucket, self.timer.histogram[bucket]))
+        return '\n'.join(lines)
+
+
+def graphSearch(problem: SearchProblem, frontier, priorityFn=None):
+    """
+    The graph search shared by DFS and BFS.  frontier is a util.Stack,
+    util.Queue or util.PriorityQueue; for a priority queue,
+    priorityFn(node) gives the priority a node is pushed with.
+
+    The goal test happens when a node is popped, and a state is expanded
+    only the first time it is popped.
+    """
+    observer = searchObserver
+    closed = set()
+    start = SearchNode(problem.getStartState())
+    priority = None
+    if priorityFn is None:
+        frontier.push(start)
+    else:
+        priority = priorityFn(start)
+        frontier.push(start, priority)
+    if observer is not None: observer.push(start, priority)
+    while not frontier.isEmpty():
+        node = frontier.pop()
+        if observer is not None: observer.pop(node)
+        if problem.isGoalState(node.state):
+            if observer is not None: observer.goal(node)
+            return node.getPath()
+        if node.state not in closed:
+            closed.add(node.state)
+            successors = problem.getSuccessors(node.state)
+            if observer is not None: observer.expand(node, successors)
+            for childState, action, stepCost in successors:
+                child = SearchNode(childState, node, action, node.pathCost + stepCost)
+                if priorityFn is None:
+                    frontier.push(child)
+                else:
+                    priority = priorityFn(child)
+                    frontier.push(child, priority)
+                if observer is not None: observer.push(child, priority)
+        elif observer is not None:
+            observer.prune(node)
+    return None
+
+
+def bestFirstSearch(problem: SearchProblem, priorityFn, frontier=None):
+    """
+    Graph search for UCS and A* that queues each state at most once.
+    frontier is a util.IndexedPriorityQueue (the default) or a
+    util.LazyPriorityQueue keyed by state; when a cheaper path to a queued
+    state turns up, its priority is lowered in place rather than a second
+    node being pushed.
+
+    Expands states in the same order as graphSearch with a
+    util.PriorityQueue.  Path costs are summed from the step costs
+    getSuccessors reports; set VALIDATE_PATH_COST to check them against
+    problem.getCostOfActions once a goal is reached.
+    """
+    if frontier is None:
+        frontier = util.IndexedPriorityQueue()
+    observer = searchObserver
+    closed = set()
+    start = SearchNode(problem.getStartState())
+    nodes = {start.state: start}
+    priority = priorityFn(start)
+    frontier.push(start.state, priority)
+    if observer is not None: observer.push(start, priority)
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        node = nodes.pop(state)
+        if observer is not None: observer.pop(node)
+        if problem.isGoalState(state):
+            if observer is not None: observer.goal(node)
+            path = node.getPath()
+            if VALIDATE_PATH_COST:
+                validatePathCost(problem, path, node.pathCost)
+            return path
+        closed.add(state)
+        successors = problem.getSuccessors(state)
+        if observer is not None: observer.expand(node, successors)
+        for childState, action, stepCost in successors:
+            if childState in closed:
+                if observer is not None: observer.prune(SearchNode(childState, node, action, node.pathCost + stepCost))
+                continue
+            child = SearchNode(childState, node, action, node.pathCost + stepCost)
+            priority = priorityFn(child)
+            if frontier.update(childState, priority):
+                if observer is not None:
+                    if childState in nodes: observer.prune(nodes[childState])
+                    observer.push(child, priority)
+                nodes[childState] = child
+            elif observer is not None:
+                observer.prune(child)
+    return None
+
+
+def validatePathCost(problem: SearchProblem, path, pathCost):
+    """
+    Raises an exception if the summed step costs of a path disagree with
+    problem.getCostOfActions.
+    """
+    actualCost = problem.getCostOfActions(path)
+    if abs(actualCost - pathCost) > 1e-9 * max(1, abs(actualCost)):
+        raise Exception('Path cost %s summed from getSuccessors step costs does not match getCostOfActions %s'
+                        % (pathCost, actualCost))
+
+
 def tinyMazeSearch(problem):
     """
     Returns a sequence of moves that solves tinyMaze.  For any other maze, the
@@ -89,20 +405,7 @@ def depthFirstSearch(problem: SearchProblem):
     print("Start's successors:", problem.getSuccessors(problem.getStartState()))
     """
     "*** YOUR CODE HERE ***"
-    closed = set()
-    q = util.Stack()
-    start_state = problem.getStartState()
-    q.push([start_state, []])
-    while not q.isEmpty():
-        cur_node = q.pop()
-        if problem.isGoalState(cur_node[0]):
-            return cur_node[1]
-        if cur_node[0] not in closed:
-            closed.add(cur_node[0])
-            for child_node in problem.getSuccessors(cur_node[0]):
-                cpy = cur_node[1].copy()
-                cpy.append(child_node[1])
-                q.push([child_node[0], cpy])
+    return graphSearch(problem, util.Stack())
 
 
 def breadthFirstSearch(problem: SearchProblem):
@@ -124,20 +427,10 @@ def breadthFirstSearch(problem: SearchProblem):
                 tmp.append(next_state[1])
                 s.push([next_state[0], tmp])
     """
-    closed = set()
-    q = util.Queue()
-    start_state = problem.getStartState()
-    q.push([start_state, []])
-    while not q.isEmpty():
-        cur_node = q.pop()
-        if problem.isGoalState(cur_node[0]):
-            return cur_node[1]
-        if cur_node[0] not in closed:
-            closed.add(cur_node[0])
-            for child_node in problem.getSuccessors(cur_node[0]):
-                cpy = cur_node[1].copy()
-                cpy.append(child_node[1])
-                q.push([child_node[0], cpy])
+    cellProblem = getCellProblem(problem)
+    if cellProblem is not None:
+        return cellBreadthFirstSearch(problem, *cellProblem)
+    return graphSearch(problem, util.Queue())
 
 
 def uniformCostSearch(problem: SearchProblem):
@@ -168,24 +461,158 @@ def uniformCostSearch(problem: SearchProblem):
                         state_to_path[next_state[0]] = [tmp, priority]
                 q.update(next_state[0], priority)
 """
+    cellProblem = getCellProblem(problem)
+    if cellProblem is not None:
+        return cellUniformCostSearch(problem, *cellProblem)
+    return bestFirstSearch(problem, lambda node: node.pathCost)
+
+
+def getCellProblem(problem: SearchProblem):
+    """
+    The problem's getCellProblem() description when it has one and BFS and
+    UCS can take the integer cell path, otherwise None.
+    """
+    if 'getCellProblem' not in dir(problem):
+        return None
+    return problem.getCellProblem()
+
+
+def cellBreadthFirstSearch(problem: SearchProblem, graph, start, goal, costs, actions):
+    """
+    breadthFirstSearch over the numbered cells of a
+    distanceCalculator.CellGraph, for problems whose states are its cells
+    (see PositionSearchProblem.getCellProblem).  A level at a time comes
+    from graph.breadthFirstLevels, and the cells are expanded, counted and
+    drawn in the same order as graphSearch with a util.Queue.  While a
+    SearchObserver is installed, observedCellBreadthFirstSearch runs
+    instead.
+    """
+    if searchObserver is not None:
+        return observedCellBreadthFirstSearch(problem, graph, start, goal, costs, actions)
+    parent, move = graph.newTree()
+    expanded = []
+    for level in graph.breadthFirstLevels(start, parent, move):
+        if parent[goal] >= 0:
+            # The goal is in this level; the cells before it get expanded.
+            expanded.append(level[:level.index(goal)])
+            return cellPath(problem, graph, expanded, parent, move, start, goal, actions)
+        expanded.append(level)
+    for cells in expanded:
+        problem.recordCellExpansions(cells)
+    return None
+
+
+def observedCellBreadthFirstSearch(problem: SearchProblem, graph, start, goal, costs, actions):
+    """
+    cellBreadthFirstSearch one cell at a time, building the search nodes
+    that the installed SearchObserver is told about.  Each cell is pushed
+    once, when it is first reached, so the frontier it reports holds no
+    duplicates, unlike graphSearch's.
+    """
+    observer = searchObserver
+    cells = graph.cells
+    parent, move = graph.newTree()
+    parent[start] = start
+    root = SearchNode(cells[start])
+    nodes = {start: root}
+    observer.push(root, None)
+    queue = util.Queue()
+    queue.push(start)
+    expanded = []
+    while not queue.isEmpty():
+        cell = queue.pop()
+        node = nodes.pop(cell)
+        observer.pop(node)
+        if cell == goal:
+            observer.goal(node)
+            return cellPath(problem, graph, [expanded], parent, move, start, goal, actions)
+        expanded.append(cell)
+        observer.expand(node, [(cells[other], actions[k], costs[other]) for other, k in graph.adjacency[cell]])
+        for other, k in graph.adjacency[cell]:
+            child = SearchNode(cells[other], node, actions[k], node.pathCost + costs[other])
+            if parent[other] < 0:
+                parent[other], move[other] = cell, k
+                nodes[other] = child
+                queue.push(other)
+                observer.push(child, None)
+            else:
+                observer.prune(child)
+    problem.recordCellExpansions(expanded)
+    return None
+
+
+def cellUniformCostSearch(problem: SearchProblem, graph, start, goal, costs, actions):
+    """
+    uniformCostSearch over the numbered cells of a
+    distanceCalculator.CellGraph (see cellBreadthFirstSearch).  When every
+    step costs the same, UCS expands cells in breadth-first order, so that
+    case goes to cellBreadthFirstSearch; otherwise this is bestFirstSearch
+    on cell indices, with costs[i] the cost of stepping onto cell i.  Search
+    nodes are only built while a SearchObserver is installed.
+    """
+    if len(set(costs)) <= 1:
+        return cellBreadthFirstSearch(problem, graph, start, goal, costs, actions)
+    observer = searchObserver
+    cells = graph.cells
+    parent, move = graph.newTree()
+    parent[start] = start
+    pathCost = {start: 0}
     closed = set()
-    q = util.PriorityQueue()
-    start_state = problem.getStartState()
-    q.push([start_state, []], 0)
-    while not q.isEmpty():
-        cur_node = q.pop()
-        if problem.isGoalState(cur_node[0]):
-            return cur_node[1]
-        if cur_node[0] not in closed:
-            closed.add(cur_node[0])
-            for child_node in problem.getSuccessors(cur_node[0]):
-                cpy = cur_node[1].copy()
-                cpy.append(child_node[1])
-                priority = problem.getCostOfActions(cpy)
-                q.update([child_node[0], cpy], priority)
+    expanded = []
+    frontier = util.IndexedPriorityQueue()
+    frontier.push(start, 0)
+    if observer is not None:
+        nodes = {start: SearchNode(cells[start])}
+        observer.push(nodes[start], 0)
+    while not frontier.isEmpty():
+        cell = frontier.pop()
+        if observer is not None:
+            node = nodes.pop(cell)
+            observer.pop(node)
+        if cell == goal:
+            if observer is not None: observer.goal(node)
+            return cellPath(problem, graph, [expanded], parent, move, start, goal, actions)
+        closed.add(cell)
+        expanded.append(cell)
+        if observer is not None:
+            observer.expand(node, [(cells[other], actions[k], costs[other]) for other, k in graph.adjacency[cell]])
+        for other, k in graph.adjacency[cell]:
+            cost = pathCost[cell] + costs[other]
+            if other in closed:
+                if observer is not None: observer.prune(SearchNode(cells[other], node, actions[k], cost))
+                continue
+            if frontier.update(other, cost):
+                pathCost[other] = cost
+                parent[other], move[other] = cell, k
+                if observer is not None:
+                    if other in nodes: observer.prune(nodes[other])
+                    nodes[other] = SearchNode(cells[other], node, actions[k], cost)
+                    observer.push(nodes[other], cost)
+            elif observer is not None:
+                observer.prune(SearchNode(cells[other], node, actions[k], cost))
+    problem.recordCellExpansions(expanded)
     return None
 
 
+def cellPath(problem: SearchProblem, graph, expanded, parent, move, start, goal, actions):
+    """
+    Finishes a cell search that reached goal: records the expanded cells
+    (a list of sequences of them) with the problem, runs its goal test on the
+    goal so it is drawn as graphSearch would have, and returns the actions
+    along parent from start.
+    """
+    for cells in expanded:
+        problem.recordCellExpansions(cells)
+    problem.isGoalState(graph.cells[goal])
+    path = []
+    cell = goal
+    while cell != start:
+        path.append(actions[move[cell]])
+        cell = parent[cell]
+    path.reverse()
+    return path
+
+
 def nullHeuristic(state, problem=None):
     """
     A heuristic function estimates the cost from the current state to the nearest
@@ -194,26 +621,475 @@ def nullHeuristic(state, problem=None):
     return 0
 
 
+def isReversible(problem: SearchProblem):
+    """
+    Whether problem declares, through an isReversible() method, that it has
+    a single goal state from getGoalState() and that getPredecessors() runs
+    its moves backwards, so bidirectionalSearch can search it.  Having the
+    two methods is not enough: a subclass may inherit them and change the
+    goal test.
+    """
+    return 'isReversible' in dir(problem) and problem.isReversible()
+
+
+class ReversedProblem(SearchProblem):
+    """
+    A reversible problem run backwards: it starts at the goal, its
+    successors are the original problem's predecessors and its goal is the
+    original start.  Any other attribute (walls, heuristicInfo, ...) is read
+    from the original problem, so heuristics written for it keep working.
+    """
+
+    def __init__(self, problem):
+        self.problem = problem
+        self.goal = problem.getStartState()
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+    def getStartState(self):
+        return self.problem.getGoalState()
+
+    def isGoalState(self, state):
+        return state == self.goal
+
+    def getSuccessors(self, state):
+        return self.problem.getPredecessors(state)
+
+
+def bidirectionalSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Search forward from the start and backward from the goal at the same
+    time.  problem must declare itself reversible (see isReversible) and
+    provide getGoalState() and getPredecessors(state), which returns
+    (predecessor, action, stepCost) triples in which action leads from
+    predecessor to state.
+
+    Each step expands whichever direction has the lower priority at the
+    front of its queue.  Whenever a state is reached that the other
+    direction has also reached, the joined path is a candidate, and the
+    search stops once the two front priorities add up to at least the best
+    candidate's cost.
+
+    heuristic is evaluated against problem (distance to the goal) and
+    against ReversedProblem(problem) (distance to the start).  Priorities
+    are the path cost plus half the difference of the two, which keeps a
+    forward and a backward priority summing to no more than the cost of any
+    path through them; the result is optimal for consistent heuristics.
+    With nullHeuristic this is bidirectional uniform cost search, or
+    bidirectional BFS when every step costs the same.
+
+    How much it saves depends on the layout: about a third of the
+    expansions on openMaze and mediumMaze, but almost nothing on bigMaze,
+    where the one-directional search already visits nearly every cell.
+    """
+    if not isReversible(problem):
+        raise Exception('Bidirectional search needs a reversible problem: one whose isReversible() is true')
+    observer = searchObserver
+    problems = (problem, ReversedProblem(problem))
+    frontiers = (util.IndexedPriorityQueue(), util.IndexedPriorityQueue())
+    reached = ({}, {})  # state -> cheapest node found so far, per direction
+    closed = (set(), set())
+    bestCost, meeting = None, None
+
+    def potential(state, side):
+        balance = (heuristic(state, problems[0]) - heuristic(state, problems[1])) / 2.0
+        return balance if side == 0 else -balance
+
+    for side in (0, 1):
+        root = SearchNode(problems[side].getStartState())
+        reached[side][root.state] = root
+        priority = potential(root.state, side)
+        frontiers[side].push(root.state, priority)
+        if observer is not None: observer.push(root, priority)
+    if problem.getGoalState() in reached[0]:
+        bestCost, meeting = 0, problem.getGoalState()
+
+    while not frontiers[0].isEmpty() and not frontiers[1].isEmpty():
+        forwardTop = frontiers[0].getPriority(frontiers[0].peek())
+        backwardTop = frontiers[1].getPriority(frontiers[1].peek())
+        if bestCost is not None and forwardTop + backwardTop >= bestCost:
+            break
+        side = 0 if forwardTop <= backwardTop else 1
+        state = frontiers[side].pop()
+        node = reached[side][state]
+        if observer is not None: observer.pop(node)
+        closed[side].add(state)
+        other = reached[1 - side]
+        successors = problems[side].getSuccessors(state)
+        if observer is not None: observer.expand(node, successors)
+        for childState, action, stepCost in successors:
+            if childState in closed[side]:
+                if observer is not None: observer.prune(SearchNode(childState, node, action, node.pathCost + stepCost))
+                continue
+            child = SearchNode(childState, node, action, node.pathCost + stepCost)
+            priority = child.pathCost + potential(childState, side)
+            if frontiers[side].update(childState, priority):
+                if observer is not None:
+                    if childState in reached[side]: observer.prune(reached[side][childState])
+                    observer.push(child, priority)
+                reached[side][childState] = child
+                if childState in other:
+                    cost = child.pathCost + other[childState].pathCost
+                    if bestCost is None or cost < bestCost:
+                        bestCost, meeting = cost, childState
+            elif observer is not None:
+                observer.prune(child)
+
+    if meeting is None:
+        return None
+    if observer is not None: observer.goal(reached[0][meeting])
+    path = reached[0][meeting].getPath()
+    node = reached[1][meeting]
+    while node.parent is not None:
+        path.append(node.action)
+        node = node.parent
+    return path
+
+
 def aStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
     """Search the node that has the lowest combined cost and heuristic first."""
     "*** YOUR CODE HERE ***"
+    return bestFirstSearch(problem, lambda node: node.pathCost + heuristic(node.state, problem))
+
+
+def jumpPointSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Jump Point Search: A* over a 4-connected grid in which every move costs
+    1.  problem must have a walls Grid and (x, y) states, as
+    PositionSearchProblem and AnyFoodSearchProblem do; only getStartState
+    and isGoalState are called, and getSuccessors is replaced by straight
+    jumps along the grid.  A problem whose costFn charges anything but 1 for
+    some cell is handed to aStarSearch instead, since jumps would skip over
+    the costs.
+
+    Among equally short paths only those that travel horizontally and turn
+    vertically at a cell where a vertical scan finds something, or travel
+    vertically until a wall opens up to one side, are followed.  The nodes
+    expanded are just the jump points where such paths turn, and the path
+    between them is filled back in at the end.  Expanded jump points are
+    counted in problem._expanded and recorded for drawExpandedCells like
+    getSuccessors does.
+    """
+    from game import Actions
+    walls = problem.walls
+    if 'costFn' in dir(problem) and any(problem.costFn(cell) != 1 for cell in walls.asList(False)):
+        return aStarSearch(problem, heuristic)
+
+    if isReversible(problem):
+        # The problem's only goal is getGoalState(), and PositionSearchProblem's
+        # goal test also draws the expanded cells, so the scans compare with
+        # that goal and only popped states are tested.
+        goal = problem.getGoalState()
+        isJumpGoal = lambda cell: cell == goal
+    else:
+        goalTests = {}
+
+        def isJumpGoal(cell):
+            "problem.isGoalState, asked at most once per cell."
+            if cell not in goalTests:
+                goalTests[cell] = problem.isGoalState(cell)
+            return goalTests[cell]
+
+    def jump(x, y, dx, dy):
+        """
+        Steps from (x, y) in direction (dx, dy) until reaching a jump point,
+        which is returned, or a wall, in which case None is returned.
+        """
+        while True:
+            x, y = x + dx, y + dy
+            if walls[x][y]:
+                return None
+            if isJumpGoal((x, y)):
+                return x, y
+            if dx != 0:
+                if jump(x, y, 0, 1) is not None or jump(x, y, 0, -1) is not None:
+                    return x, y
+            elif (not walls[x - 1][y] and walls[x - 1][y - dy]) or \
+                    (not walls[x + 1][y] and walls[x + 1][y - dy]):
+                return x, y
+
+    def directions(node):
+        """
+        The directions worth jumping in from node, given how it was reached.
+        """
+        if node.parent is None:
+            return [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        (x, y), (px, py) = node.state, node.parent.state
+        dx, dy = (x > px) - (x < px), (y > py) - (y < py)
+        if dx != 0:
+            return [(dx, 0), (0, 1), (0, -1)]
+        forced = [(side, 0) for side in (-1, 1) if not walls[x + side][y] and walls[x + side][y - dy]]
+        return [(0, dy)] + forced
+
+    observer = searchObserver
+    frontier = util.IndexedPriorityQueue()
     closed = set()
-    q = util.PriorityQueue()
-    start_state = problem.getStartState()
-    q.push([start_state, []], heuristic(start_state, problem))
-    while not q.isEmpty():
-        cur_node = q.pop()
-        if problem.isGoalState(cur_node[0]):
-            return cur_node[1]
-        if cur_node[0] not in closed:
-            closed.add(cur_node[0])
-            for child_node in problem.getSuccessors(cur_node[0]):
-                cpy = cur_node[1].copy()
-                cpy.append(child_node[1])
-                priority = problem.getCostOfActions(cpy) + heuristic(child_node[0], problem)
-                q.update([child_node[0], cpy], priority)
+    start = SearchNode(problem.getStartState())
+    nodes = {start.state: start}
+    priority = heuristic(start.state, problem)
+    frontier.push(start.state, priority)
+    if observer is not None: observer.push(start, priority)
+    while not frontier.isEmpty():
+        state = frontier.pop()
+        node = nodes.pop(state)
+        if observer is not None: observer.pop(node)
+        if problem.isGoalState(state):
+            if observer is not None: observer.goal(node)
+            return jumpPath(node, Actions)
+        closed.add(state)
+        if '_expanded' in dir(problem):
+            problem._expanded += 1
+            if state not in problem._visited:
+                problem._visited[state] = True
+                problem._visitedlist.append(state)
+        children = []
+        for dx, dy in directions(node):
+            childState = jump(state[0], state[1], dx, dy)
+            if childState is not None:
+                distance = abs(childState[0] - state[0]) + abs(childState[1] - state[1])
+                children.append(SearchNode(childState, node, None, node.pathCost + distance))
+        if observer is not None: observer.expand(node, children)
+        for child in children:
+            if child.state in closed:
+                if observer is not None: observer.prune(child)
+                continue
+            priority = child.pathCost + heuristic(child.state, problem)
+            if frontier.update(child.state, priority):
+                if observer is not None:
+                    if child.state in nodes: observer.prune(nodes[child.state])
+                    observer.push(child, priority)
+                nodes[child.state] = child
+            elif observer is not None:
+                observer.prune(child)
     return None
-    util.raiseNotDefined()
+
+
+def jumpPath(node, Actions):
+    """
+    Expands the straight segments between a chain of jump points into the
+    list of single-step actions that walks them.
+    """
+    path = []
+    while node.parent is not None:
+        (x, y), (px, py) = node.state, node.parent.state
+        action = Actions.vectorToDirection((x - px, y - py))
+        path.extend([action] * (abs(x - px) + abs(y - py)))
+        node = node.parent
+    path.reverse()
+    return path
+
+
+def idaStarSearch(problem: SearchProblem, heuristic=nullHeuristic):
+    """
+    Iterative deepening A*: repeated depth-first searches that cut off at a
+    bound on cost plus heuristic, raising the bound each round to the
+    smallest value that was cut off.  Only the current path is kept in
+    memory, so states are expanded again on every round and once per path
+    that reaches them.  Optimal for admissible heuristics.
+    """
+    observer = searchObserver
+    start = SearchNode(problem.getStartState())
+    if problem.isGoalState(start.state):
+        if observer is not None: observer.goal(start)
+        return []
+    bound = heuristic(start.state, problem)
+
+    def expand(node):
+        successors = problem.getSuccessors(node.state)
+        if observer is not None: observer.expand(node, successors)
+        return iter(successors)
+
+    while True:
+        nextBound = float('inf')
+        onPath = set([start.state])
+        if observer is not None: observer.push(start, bound)
+        stack = [(start, expand(start))]
+        while stack:
+            node, successors = stack[-1]
+            for childState, action, stepCost in successors:
+                if childState in onPath:
+                    continue
+                child = SearchNode(childState, node, action, node.pathCost + stepCost)
+                f = child.pathCost + heuristic(childState, problem)
+                if f > bound:
+                    nextBound = min(nextBound, f)
+                    if observer is not None: observer.prune(child)
+                    continue
+                if problem.isGoalState(childState):
+                    if observer is not None: observer.goal(child)
+                    return child.getPath()
+                onPath.add(childState)
+                if observer is not None: observer.push(child, f)
+                stack.append((child, expand(child)))
+                break
+            else:
+                stack.pop()
+                if observer is not None: observer.pop(node)
+                onPath.discard(node.state)
+        if nextBound == float('inf'):
+            return None
+        bound = nextBound
+
+
+class MemoryBoundedNode(SearchNode):
+    """
+    A SearchNode with the bookkeeping smaStarSearch needs to drop a child
+    from memory and regenerate it later.
+    """
+    __slots__ = ('index', 'f', 'successors', 'nextSuccessor', 'children', 'forgotten',
+                 'version', 'inMemory')
+
+    def __init__(self, state, parent=None, action=None, pathCost=0, index=None):
+        SearchNode.__init__(self, state, parent, action, pathCost)
+        self.index = index          # position among the parent's successors
+        self.f = 0
+        self.successors = None      # (state, action, stepCost) triples once expanded
+        self.nextSuccessor = 0      # index of the first successor never generated
+        self.children = {}          # successor index -> child in memory
+        self.forgotten = {}         # successor index -> f of a child dropped from memory
+        self.version = 0            # bumped whenever the node's queue keys change
+        self.inMemory = True
+
+    def isExpanded(self):
+        "True once every successor has been generated at least once."
+        return self.successors is not None and self.nextSuccessor == len(self.successors)
+
+    def openPriority(self):
+        """
+        The lowest f among successors not in memory, or infinity if there are
+        none left worth generating.
+        """
+        if not self.isExpanded():
+            return self.f
+        if self.forgotten:
+            return min(self.forgotten.values())
+        return float('inf')
+
+
+def smaStarSearch(problem: SearchProblem, heuristic=nullHeuristic, maxNodes=None):
+    """
+    Simplified memory-bounded A*: A* over the search tree that keeps at most
+    maxNodes nodes (SMA_NODE_BUDGET by default) in memory.  Successors are
+    generated one at a time.  When memory is full, the shallowest of the
+    leaves with the highest f is dropped and its f is remembered by its
+    parent, so the subtree is regenerated only once it looks best again.
+
+    Returns an optimal path if one fits in maxNodes nodes, otherwise the
+    cheapest path that fits, or None if none does.  A child whose state is already in memory
+    with a path that costs no more is never worth expanding, so it is
+    given an infinite f.
+    """
+    if maxNodes is None:
+        maxNodes = SMA_NODE_BUDGET
+    infinity = float('inf')
+    counter = itertools.count()
+    frontier = []   # (openPriority, -depth, count, version, node): the deepest best node first
+    leaves = []     # (-f, depth, count, version, node): the shallowest worst leaf first
+    observer = searchObserver
+    cheapest = {}   # state -> in-memory node with the cheapest path to it
+    used = [1]
+
+    def queue(node):
+        node.version += 1
+        priority = node.openPriority()
+        if priority < infinity:
+            heapq.heappush(frontier, (priority, -node.depth, next(counter), node.version, node))
+        if not node.children and node.parent is not None:
+            heapq.heappush(leaves, (-node.f, node.depth, next(counter), node.version, node))
+
+    def backup(node):
+        """
+        Re-queues node and, while its f changes, sets the f of each fully
+        expanded ancestor to the lowest f among its successors.
+        """
+        while node is not None:
+            if node.isExpanded():
+                values = [child.f for child in node.children.values()] + list(node.forgotten.values())
+                f = min(values) if values else infinity
+                if f != node.f:
+                    node.f = f
+                    queue(node)
+                    node = node.parent
+                    continue
+            queue(node)
+            return
+
+    def forgetWorstLeaf():
+        while leaves:
+            _, _, _, version, leaf = heapq.heappop(leaves)
+            if leaf.inMemory and version == leaf.version and not leaf.children:
+                break
+        else:
+            return False
+        parent = leaf.parent
+        del parent.children[leaf.index]
+        parent.forgotten[leaf.index] = leaf.f
+        leaf.inMemory = False
+        if observer is not None: observer.prune(leaf)
+        if cheapest.get(leaf.state) is leaf:
+            del cheapest[leaf.state]
+        used[0] -= 1
+        backup(parent)
+        return True
+
+    root = MemoryBoundedNode(problem.getStartState())
+    root.f = heuristic(root.state, problem)
+    cheapest[root.state] = root
+    queue(root)
+    if observer is not None: observer.push(root, root.f)
+    while True:
+        while frontier:
+            _, _, _, version, node = frontier[0]
+            if node.inMemory and version == node.version:
+                break
+            heapq.heappop(frontier)
+        else:
+            return None
+        if problem.isGoalState(node.state):
+            if observer is not None: observer.goal(node)
+            return node.getPath()
+
+        if node.successors is None:
+            ancestors = set()
+            ancestor = node.parent
+            while ancestor is not None:
+                ancestors.add(ancestor.state)
+                ancestor = ancestor.parent
+            node.successors = [successor for successor in problem.getSuccessors(node.state)
+                               if successor[0] not in ancestors]
+            if observer is not None: observer.expand(node, node.successors)
+        if not node.isExpanded():
+            index = node.nextSuccessor
+            node.nextSuccessor += 1
+            remembered = node.f
+        elif node.forgotten:
+            index = min(node.forgotten, key=node.forgotten.get)
+            remembered = node.forgotten.pop(index)
+        else:
+            # A dead end: nothing below it can reach a goal.
+            node.f = infinity
+            backup(node)
+            continue
+
+        childState, action, stepCost = node.successors[index]
+        child = MemoryBoundedNode(childState, node, action, node.pathCost + stepCost, index)
+        other = cheapest.get(childState)
+        if other is not None and other.pathCost <= child.pathCost:
+            child.f = infinity
+        elif child.depth >= maxNodes - 1 and not problem.isGoalState(childState):
+            # Its path already fills memory, so nothing below it fits.
+            child.f = infinity
+        else:
+            cheapest[childState] = child
+            child.f = max(remembered, child.pathCost + heuristic(childState, problem))
+        node.children[index] = child
+        used[0] += 1
+        queue(child)
+        if observer is not None: observer.push(child, child.f)
+        backup(node)
+        while used[0] > maxNodes and forgetWorstLeaf():
+            pass
 
 
 # Abbreviations
@@ -221,3 +1097,7 @@ bfs = breadthFirstSearch
 dfs = depthFirstSearch
 astar = aStarSearch
 ucs = uniformCostSearch
+bidi = bidirectionalSearch
+jps = jumpPointSearch
+idastar = idaStarSearch
+smastar = smaStarSearch
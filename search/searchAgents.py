@@ -38,10 +38,14 @@ from typing import List, Tuple, Any
 from game import Directions
 from game import Agent
 from game import Actions
+from game import BitGrid
+from game import Grid
 import util
 import time
+import collections
 import search
 import pacman
+import distanceCalculator
 
 
 class GoWestAgent(Agent):
@@ -70,10 +74,15 @@ class SearchAgent(Agent):
     Options for fn include:
       depthFirstSearch or dfs
       breadthFirstSearch or bfs
+    Pass stats=True to print the search's statistics (see
+    search.StatisticsObserver) once it finishes.
     Note: You should NOT change any code in SearchAgent
     """
 
-    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic'):
+    # Subclasses that set searchFunction themselves never collect statistics.
+    stats = False
+
+    def __init__(self, fn='depthFirstSearch', prob='PositionSearchProblem', heuristic='nullHeuristic', stats='False'):
         # Warning: some advanced Python magic is employed below to find the right functions and problems
 
         # Get the search function from the name and heuristic
@@ -99,6 +108,7 @@ class SearchAgent(Agent):
             raise AttributeError(prob + ' is not a search problem type in SearchAgents.py.')
         self.searchType = globals()[prob]
         print('[SearchAgent] using problem type ' + prob)
+        self.stats = str(stats) == 'True'
 
     def registerInitialState(self, state):
         """
@@ -112,12 +122,18 @@ class SearchAgent(Agent):
         if self.searchFunction == None: raise Exception("No search function provided for SearchAgent")
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem
-        self.actions = self.searchFunction(problem)  # Find a path
+        observer = search.StatisticsObserver() if self.stats else None
+        search.setSearchObserver(observer)
+        try:
+            self.actions = self.searchFunction(problem)  # Find a path
+        finally:
+            search.setSearchObserver(None)
         if self.actions == None:
             self.actions = []
         totalCost = problem.getCostOfActions(self.actions)
         print('Path found with total cost of %d in %.1f seconds' % (totalCost, time.time() - starttime))
         if '_expanded' in dir(problem): print('Search nodes expanded: %d' % problem._expanded)
+        if observer is not None: print(observer.summary())
 
     def getAction(self, state):
         """
@@ -136,6 +152,10 @@ class SearchAgent(Agent):
             return Directions.STOP
 
 
+# The action for each of distanceCalculator.CELL_MOVES.
+CELL_ACTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]
+
+
 class PositionSearchProblem(search.SearchProblem):
     """
     A search problem defines the state space, start state, goal test, successor
@@ -147,6 +167,10 @@ class PositionSearchProblem(search.SearchProblem):
     Note: this search problem is fully specified; you should NOT change it.
     """
 
+    # Built on first use by getCellGraph, since subclasses need not call
+    # this class's __init__.
+    cellGraph = None
+
     def __init__(self, gameState, costFn=lambda x: 1, goal=(1, 1), start=None, warn=True, visualize=True):
         """
         Stores the start and goal.
@@ -170,6 +194,9 @@ class PositionSearchProblem(search.SearchProblem):
     def getStartState(self):
         return self.startState
 
+    def getGoalState(self):
+        return self.goal
+
     def isGoalState(self, state):
         isGoal = state == self.goal
 
@@ -196,14 +223,56 @@ class PositionSearchProblem(search.SearchProblem):
         """
 
         successors = []
+        graph = self.getCellGraph()
+        index = graph.cellIndex.get(state)
+        if index is not None:
+            cells = graph.cells
+            for other, move in graph.adjacency[index]:
+                nextState = cells[other]
+                successors.append((nextState, CELL_ACTIONS[move], self.costFn(nextState)))
+        else:
+            for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                x, y = state
+                dx, dy = Actions.directionToVector(action)
+                nextx, nexty = int(x + dx), int(y + dy)
+                if not self.walls[nextx][nexty]:
+                    nextState = (nextx, nexty)
+                    cost = self.costFn(nextState)
+                    successors.append((nextState, action, cost))
+
+        # Bookkeeping for display purposes
+        self._expanded += 1  # DO NOT CHANGE
+        if state not in self._visited:
+            self._visited[state] = True
+            self._visitedlist.append(state)
+
+        return successors
+
+    def isReversible(self):
+        """
+        Whether search.bidirectionalSearch can run on this problem, and
+        search.jumpPointSearch can scan for its goal position directly: true
+        unless a subclass changed the goal test, so that the single goal
+        position from getGoalState is no longer the only goal.
+        """
+        return type(self).isGoalState is PositionSearchProblem.isGoalState
+
+    def getPredecessors(self, state):
+        """
+        Returns (predecessor, action, stepCost) triples for the positions one
+        move away from state, where action moves from predecessor to state.
+        Moves are reversible, so these are the neighbours of state with the
+        directions flipped; every one costs costFn(state) to step from.
+        Used by search.bidirectionalSearch.
+        """
+        predecessors = []
+        cost = self.costFn(state)
         for action in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
             x, y = state
             dx, dy = Actions.directionToVector(action)
-            nextx, nexty = int(x + dx), int(y + dy)
-            if not self.walls[nextx][nexty]:
-                nextState = (nextx, nexty)
-                cost = self.costFn(nextState)
-                successors.append((nextState, action, cost))
+            prevx, prevy = int(x + dx), int(y + dy)
+            if not self.walls[prevx][prevy]:
+                predecessors.append(((prevx, prevy), Actions.reverseDirection(action), cost))
 
         # Bookkeeping for display purposes
         self._expanded += 1  # DO NOT CHANGE
@@ -211,7 +280,47 @@ class PositionSearchProblem(search.SearchProblem):
             self._visited[state] = True
             self._visitedlist.append(state)
 
-        return successors
+        return predecessors
+
+    def getCellGraph(self):
+        "The distanceCalculator.CellGraph of self.walls, shared by every problem on them."
+        if self.cellGraph is None:
+            self.cellGraph = distanceCalculator.getCellGraph(self.walls)
+        return self.cellGraph
+
+    def getCellProblem(self):
+        """
+        Describes this problem for the integer cell searches in search.py
+        (see search.cellBreadthFirstSearch) as (graph, start cell, goal cell,
+        step costs, actions): costs[i] is costFn at cell i and actions[k]
+        the action for move k.  Returns None when the problem does not fit
+        that mould: a subclass changed the goal test or the successors, or
+        the start or goal is not an open cell.
+        """
+        if type(self).isGoalState is not PositionSearchProblem.isGoalState or \
+                type(self).getSuccessors is not PositionSearchProblem.getSuccessors:
+            return None
+        graph = self.getCellGraph()
+        if self.startState not in graph.cellIndex or self.goal not in graph.cellIndex:
+            return None
+        costs = [self.costFn(cell) for cell in graph.cells]
+        return graph, graph.cellIndex[self.startState], graph.cellIndex[self.goal], costs, CELL_ACTIONS
+
+    def recordCellExpansions(self, expanded):
+        """
+        The display bookkeeping of getSuccessors for a cell search that
+        expanded the cells in expanded (indices into self.cellGraph.cells),
+        in order.  The cells are only turned back into positions when they
+        will be drawn.
+        """
+        self._expanded += len(expanded)
+        if self.visualize:
+            cells = self.cellGraph.cells
+            for index in expanded:
+                state = cells[index]
+                if state not in self._visited:
+                    self._visited[state] = True
+                    self._visitedlist.append(state)
 
     def getCostOfActions(self, actions):
         """
@@ -296,6 +405,29 @@ class CornersProblem(search.SearchProblem):
                 print('Warning: no food in corner ' + str(corner))
         self._expanded = 0  # DO NOT CHANGE; Number of search nodes expanded
 
+        # cornerDistances[i][position] is the maze distance from any open
+        # position to corner i, and cornerTours[unvisited][i] the length of
+        # the shortest walk that starts at corner i and visits every corner
+        # in the bitmask unvisited (bit i for corner i), for all 16 masks.
+        distances = distanceCalculator.getMazeDistances(self.walls)
+        self.cornerDistances = []
+        for corner in self.corners:
+            if corner in distances.cellIndex:
+                self.cornerDistances.append(dict((cell, distances.getDistance(corner, cell))
+                                                 for cell in distances.cells))
+            else:
+                self.cornerDistances.append(util.Counter())
+        self.cornerTours = [[0] * 4 for unvisited in range(16)]
+        for unvisited in range(1, 16):
+            for i in range(4):
+                if not unvisited & 1 << i: continue
+                rest = unvisited & ~(1 << i)
+                if rest:
+                    self.cornerTours[unvisited][i] = min(
+                        self.cornerDistances[i].get(self.corners[j], distanceCalculator.UNREACHABLE)
+                        + self.cornerTours[rest][j]
+                        for j in range(4) if rest & 1 << j)
+
     def getStartState(self):
         """
         Returns the start state (in your state space, not the full Pacman state
@@ -383,17 +515,16 @@ def cornersHeuristic(state: Any, problem: CornersProblem):
     "*** YOUR CODE HERE ***"
 
     # state is (reached_lb, reached_lt, reached_rb, reached_rt,position)
-    top, right = problem.walls.height - 2, problem.walls.width - 2
-    max_dis = 0
-    unreached_cnt = 0
+    # The exact length of the shortest walk from here through every corner
+    # not yet reached, going corner to corner by maze distance.
+    unvisited = 0
     for i in range(0, 4):
         if not state[i]:
-            unreached_cnt += 1
-            max_dis = max(max_dis, util.manhattanDistance(state[4], corners[i]))
-    if unreached_cnt == 0:
-        return 0  # Default to trivial solution
-    else:
-        return max_dis
+            unvisited |= 1 << i
+    if unvisited == 0:
+        return 0
+    return min(problem.cornerDistances[i][state[4]] + problem.cornerTours[unvisited][i]
+               for i in range(0, 4) if unvisited & 1 << i)
 
 
 class AStarCornersAgent(SearchAgent):
@@ -411,11 +542,14 @@ class FoodSearchProblem:
 
     A search state in this problem is a tuple ( pacmanPosition, foodGrid ) where
       pacmanPosition: a tuple (x,y) of integers specifying Pacman's position
-      foodGrid:       a Grid (see game.py) of either True or False, specifying remaining food
+      foodGrid:       a BitGrid (see game.py) of either True or False, specifying remaining food
+
+    The food is held in a BitGrid rather than a list-of-lists Grid so that the
+    per-successor copy and the closed-set hash stay cheap.
     """
 
     def __init__(self, startingGameState: pacman.GameState):
-        self.start = (startingGameState.getPacmanPosition(), startingGameState.getFood())
+        self.start = (startingGameState.getPacmanPosition(), BitGrid.fromGrid(startingGameState.getFood()))
         self.walls = startingGameState.getWalls()
         self.startingGameState = startingGameState
         self._expanded = 0  # DO NOT CHANGE
@@ -456,6 +590,140 @@ class FoodSearchProblem:
         return cost
 
 
+class FoodIndex:
+    """
+    Numbers the food of a starting state: the i-th dot of food.asList() is
+    bit 1 << i in a FoodMask.  Shared by every FoodMask of one problem.
+    """
+
+    def __init__(self, food):
+        self.width = food.width
+        self.height = food.height
+        self.foodList = food.asList()
+        self.bitOf = dict((position, 1 << i) for i, position in enumerate(self.foodList))
+        self.fullMask = (1 << len(self.foodList)) - 1
+
+
+class FoodMask:
+    """
+    The food left in a CompactFoodSearchProblem state: an int with one bit per
+    dot of the problem's FoodIndex.  Hashing and equality look at that int
+    alone.  It is read-only, but supports the Grid reads heuristics make
+    (food[x][y], get, count, asList, copy), so heuristics written for
+    FoodSearchProblem work unchanged; toGrid() gives a real Grid.
+    """
+    __slots__ = ('mask', 'foodIndex')
+
+    def __init__(self, mask, foodIndex):
+        self.mask = mask
+        self.foodIndex = foodIndex
+
+    @property
+    def width(self):
+        return self.foodIndex.width
+
+    @property
+    def height(self):
+        return self.foodIndex.height
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __eq__(self, other):
+        if not isinstance(other, FoodMask): return False
+        return self.mask == other.mask and self.foodIndex is other.foodIndex
+
+    def __getitem__(self, x):
+        return _FoodMaskColumn(self, x)
+
+    def __str__(self):
+        return str(self.toGrid())
+
+    def get(self, x, y):
+        return self.mask & self.foodIndex.bitOf.get((x, y), 0) != 0
+
+    def count(self, item=True):
+        food = bin(self.mask).count('1')
+        if item: return food
+        return self.width * self.height - food
+
+    def copy(self):
+        return self
+
+    def asList(self, key=True):
+        if not key:
+            return self.toGrid().asList(False)
+        foodList = self.foodIndex.foodList
+        mask = self.mask
+        food = []
+        while mask:
+            lowest = mask & -mask
+            food.append(foodList[lowest.bit_length() - 1])
+            mask ^= lowest
+        return food
+
+    def toGrid(self):
+        grid = Grid(self.width, self.height)
+        for x, y in self.asList():
+            grid[x][y] = True
+        return grid
+
+
+class _FoodMaskColumn:
+    "The food[x] half of a FoodMask lookup."
+    __slots__ = ('food', 'x')
+
+    def __init__(self, food, x):
+        self.food = food
+        self.x = x
+
+    def __getitem__(self, y):
+        return self.food.get(self.x, y)
+
+
+class CompactFoodSearchProblem(FoodSearchProblem):
+    """
+    FoodSearchProblem with the food held as a FoodMask, so a state is a
+    position and an int.  The moves out of every open cell, and the food bit
+    each one eats, are worked out once up front, which makes a successor a
+    table lookup and a mask operation.  Positions stay (x,y) tuples (shared
+    from that table) so heuristics and getCostOfActions can use them as
+    coordinates.
+    """
+
+    def __init__(self, startingGameState: pacman.GameState):
+        FoodSearchProblem.__init__(self, startingGameState)
+        self.foodIndex = FoodIndex(startingGameState.getFood())
+        cells = dict((cell, cell) for cell in self.walls.asList(False))
+        self.moves = {}
+        for x, y in cells:
+            moves = []
+            for direction in [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST]:
+                dx, dy = Actions.directionToVector(direction)
+                nextPosition = (int(x + dx), int(y + dy))
+                if nextPosition in cells:
+                    moves.append((cells[nextPosition], direction, self.foodIndex.bitOf.get(nextPosition, 0)))
+            self.moves[(x, y)] = moves
+        position = startingGameState.getPacmanPosition()
+        self.start = (cells.get(position, position), FoodMask(self.foodIndex.fullMask, self.foodIndex))
+
+    def isGoalState(self, state):
+        return state[1].mask == 0
+
+    def getSuccessors(self, state):
+        "Returns successor states, the actions they require, and a cost of 1."
+        successors = []
+        self._expanded += 1  # DO NOT CHANGE
+        position, food = state
+        for nextPosition, direction, bit in self.moves[position]:
+            if food.mask & bit:
+                nextFood = FoodMask(food.mask & ~bit, food.foodIndex)
+            else:
+                nextFood = food
+            successors.append(((nextPosition, nextFood), direction, 1))
+        return successors
+
+
 class AStarFoodSearchAgent(SearchAgent):
     "A SearchAgent for FoodSearchProblem using A* and your foodHeuristic"
 
@@ -494,14 +762,52 @@ def foodHeuristic(state: Tuple[Tuple, List[List]], problem: FoodSearchProblem):
     """
     position, foodGrid = state
     "*** YOUR CODE HERE ***"
-    if problem.isGoalState(state):
+    # Any path that eats every dot first walks to some dot, then joins all
+    # the dots together, so it costs at least the distance to the nearest
+    # dot plus a minimum spanning tree over the dots.  It also has to reach
+    # the farthest dot.  Both bounds are consistent, and so is their max.
+    if 'mazeDistances' not in problem.heuristicInfo:
+        problem.heuristicInfo['mazeDistances'] = distanceCalculator.getMazeDistances(problem.walls)
+        problem.heuristicInfo['spanningTrees'] = collections.OrderedDict()
+    distances = problem.heuristicInfo['mazeDistances']
+    foodList = foodGrid.asList()
+    if not foodList:
         return 0
-    ans = 0
-    for i in range(foodGrid.width):
-        for j in range(foodGrid.height):
-            if foodGrid[i][j]:
-                ans = max(ans, mazeDistance((i, j), position, problem.startingGameState))
-    return ans
+    toFood = [distances.getDistance(position, food) for food in foodList]
+    treeCost = foodSpanningTreeCost(foodGrid, foodList, distances, problem.heuristicInfo['spanningTrees'])
+    return max(max(toFood), min(toFood) + treeCost)
+
+
+# The most food sets whose spanning tree cost foodHeuristic remembers.
+SPANNING_TREE_CACHE_SIZE = 100000
+
+
+def foodSpanningTreeCost(foodGrid, foodList, distances, cache):
+    """
+    Returns the weight of a minimum spanning tree over the dots in foodList,
+    using maze distances.  Most successors eat nothing and share their
+    parent's food, so results are kept in cache, an OrderedDict keyed by the
+    food grid that holds the SPANNING_TREE_CACHE_SIZE most recently used.
+    """
+    if foodGrid in cache:
+        cache.move_to_end(foodGrid)
+        return cache[foodGrid]
+    # Prim's algorithm over the dots' rows of the distance matrix.
+    columns = [distances.cellIndex[food] for food in foodList]
+    row = distances.getDistancesFrom(foodList[0])
+    linkCost = dict((i, row[columns[i]]) for i in range(1, len(foodList)))
+    cost = 0
+    while linkCost:
+        nearest = min(linkCost, key=linkCost.get)
+        cost += int(linkCost.pop(nearest))
+        row = distances.getDistancesFrom(foodList[nearest])
+        for i in linkCost:
+            if row[columns[i]] < linkCost[i]:
+                linkCost[i] = row[columns[i]]
+    cache[foodGrid.copy()] = cost
+    if len(cache) > SPANNING_TREE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return cost
 
 
 class ClosestDotSearchAgent(SearchAgent):
@@ -577,9 +883,10 @@ class AnyFoodSearchProblem(PositionSearchProblem):
 
 def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pacman.GameState) -> int:
     """
-    Returns the maze distance between any two points, using the search functions
-    you have already built. The gameState can be any game state -- Pacman's
-    position in that state is ignored.
+    Returns the maze distance between any two points, looked up in the
+    all-pairs distances for the layout's walls (see
+    distanceCalculator.getMazeDistances). The gameState can be any game
+    state -- Pacman's position in that state is ignored.
 
     Example usage: mazeDistance( (2,4), (5,6), gameState)
 
@@ -590,5 +897,4 @@ def mazeDistance(point1: Tuple[int, int], point2: Tuple[int, int], gameState: pa
     walls = gameState.getWalls()
     assert not walls[x1][y1], 'point1 is a wall: ' + str(point1)
     assert not walls[x2][y2], 'point2 is a wall: ' + str(point2)
-    prob = PositionSearchProblem(gameState, start=point1, goal=point2, warn=False, visualize=False)
-    return len(search.bfs(prob))
+    return distanceCalculator.getMazeDistances(walls).getDistance(point1, point2)
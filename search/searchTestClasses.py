@@ -13,6 +13,7 @@
 
 
 import sys
+import random
 import re
 import testClasses
 import textwrap
@@ -821,3 +822,305 @@ class CornerHeuristicPacman(testClasses.TestCase):
         handle.close()
         return True
 
+
+
+def randomEightPuzzles(eightpuzzle, seed, count, moves, size):
+    "Returns count random puzzles built from a fixed seed."
+    saved = random.getstate()
+    random.seed(seed)
+    try:
+        return [eightpuzzle.createRandomEightPuzzle(moves, size) for _ in range(count)]
+    finally:
+        random.setstate(saved)
+
+class EightPuzzleConsistencyTest(testClasses.TestCase):
+
+    def __init__(self, question, testDict):
+        super(EightPuzzleConsistencyTest, self).__init__(question, testDict)
+        self.heuristicName = testDict['heuristic']
+        self.size = int(testDict['size'])
+        self.seed = int(testDict['seed'])
+        self.walks = int(testDict['walks'])
+        self.moves = int(testDict['moves'])
+
+    def execute(self, grades, moduleDict, solutionDict):
+        import eightpuzzle
+        heuristic = getattr(eightpuzzle, self.heuristicName)
+        goal = eightpuzzle.EightPuzzleState(list(range(self.size * self.size)))
+        if heuristic(goal) != 0:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tHeuristic failed H(goal) == 0 test')
+            return False
+
+        checked = 0
+        for puzzle in randomEightPuzzles(eightpuzzle, self.seed, self.walks, self.moves, self.size):
+            h0 = heuristic(puzzle)
+            for move in puzzle.legalMoves():
+                h1 = heuristic(puzzle.result(move))
+                checked += 1
+                if abs(h0 - h1) > 1:
+                    grades.addMessage('FAIL: %s' % self.path)
+                    grades.addMessage('\tHeuristic failed consistency test: %d -> %d on move %s from' % (h0, h1, move))
+                    grades.addMessage(str(puzzle))
+                    return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tmoves checked:\t\t%s' % checked)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# File intentionally blank.\n')
+        handle.close()
+        return True
+
+class EightPuzzleOptimalityTest(testClasses.TestCase):
+
+    def __init__(self, question, testDict):
+        super(EightPuzzleOptimalityTest, self).__init__(question, testDict)
+        self.heuristicName = testDict['heuristic']
+        self.size = int(testDict['size'])
+        self.seed = int(testDict['seed'])
+        self.puzzles = int(testDict['puzzles'])
+        self.moves = int(testDict['moves'])
+
+    def execute(self, grades, moduleDict, solutionDict):
+        import eightpuzzle
+        search = moduleDict['search']
+        heuristic = getattr(eightpuzzle, self.heuristicName)
+        optimalCosts = [int(cost) for cost in solutionDict['bfs_costs'].split()]
+        puzzles = randomEightPuzzles(eightpuzzle, self.seed, self.puzzles, self.moves, self.size)
+        for puzzle, optimal in zip(puzzles, optimalCosts):
+            problem = eightpuzzle.EightPuzzleSearchProblem(puzzle)
+            path = search.astar(problem, heuristic)
+            if not checkSolution(problem, path) or len(path) != optimal:
+                grades.addMessage('FAIL: %s' % self.path)
+                grades.addMessage('\tastar found a path of %d moves, bfs found %d, for' % (len(path), optimal))
+                grades.addMessage(str(puzzle))
+                return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpuzzles solved:\t\t%s' % self.puzzles)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        import eightpuzzle
+        search = moduleDict['search']
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The optimal solution lengths, found by breadth-first search.\n')
+        puzzles = randomEightPuzzles(eightpuzzle, self.seed, self.puzzles, self.moves, self.size)
+        costs = [len(search.bfs(eightpuzzle.EightPuzzleSearchProblem(puzzle))) for puzzle in puzzles]
+        handle.write('bfs_costs: "%s"\n' % ' '.join(str(cost) for cost in costs))
+        handle.close()
+        return True
+
+class BidirectionalSearchTest(testClasses.TestCase):
+
+    def __init__(self, question, testDict):
+        super(BidirectionalSearchTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.searchProblemClassName = testDict['searchProblemClass']
+
+    def setupProblem(self, searchAgents):
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        problemClass = getattr(searchAgents, self.searchProblemClassName)
+        if problemClass is searchAgents.PositionSearchProblem:
+            return problemClass(gameState, warn=False, visualize=False)
+        return problemClass(gameState)
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        reversible = solutionDict['reversible'] == 'True'
+        problem = self.setupProblem(searchAgents)
+
+        if search.isReversible(problem) != reversible:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tisReversible should be %s for %s' % (reversible, self.searchProblemClassName))
+            return False
+
+        if not reversible:
+            try:
+                search.bidirectionalSearch(problem)
+            except AttributeError as e:
+                grades.addMessage('FAIL: %s' % self.path)
+                grades.addMessage('\tbidirectionalSearch crashed instead of refusing the problem: %s' % e)
+                return False
+            except Exception:
+                grades.addMessage('PASS: %s' % self.path)
+                grades.addMessage('\tbidirectionalSearch refused %s' % self.searchProblemClassName)
+                return True
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tbidirectionalSearch ran on a problem that is not reversible')
+            return False
+
+        gold_length = int(solutionDict['solution_length'])
+        path = search.bidirectionalSearch(problem)
+        if not checkSolution(self.setupProblem(searchAgents), path) or len(path) != gold_length:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tbidirectionalSearch path of length %s, optimal is %s' % (len(path), gold_length))
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tsolution length:\t\t%s' % len(path))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        problem = self.setupProblem(searchAgents)
+        reversible = search.isReversible(problem)
+        handle.write('reversible: "%s"\n' % reversible)
+        if reversible:
+            handle.write('solution_length: "%s"\n' % len(search.uniformCostSearch(problem)))
+        handle.close()
+        return True
+
+class JumpPointSearchTest(testClasses.TestCase):
+
+    def __init__(self, question, testDict):
+        super(JumpPointSearchTest, self).__init__(question, testDict)
+        self.layoutText = testDict['layout']
+        self.layoutName = testDict['layoutName']
+        self.costFn = testDict['costFn']
+        self.goalTest = testDict['goalTest']
+
+    def setupProblem(self, searchAgents):
+        lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+        gameState = pacman.GameState()
+        gameState.initialize(lay, 0)
+        costFn = {'unit': lambda pos: 1, 'east': lambda pos: .5 ** pos[0]}[self.costFn]
+        if self.goalTest == 'food':
+            # Keeps the (1, 1) default goal attribute but looks for food instead
+            class FoodPositionProblem(searchAgents.PositionSearchProblem):
+                def isGoalState(self, state):
+                    return self.food[state[0]][state[1]]
+            problem = FoodPositionProblem(gameState, costFn, warn=False, visualize=False)
+            problem.food = gameState.getFood()
+            return problem
+        return searchAgents.PositionSearchProblem(gameState, costFn, warn=False, visualize=False)
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gold_cost = float(solutionDict['solution_cost'])
+        problem = self.setupProblem(searchAgents)
+        path = search.jumpPointSearch(problem)
+
+        if path is None or not checkSolution(self.setupProblem(searchAgents), path):
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tjumpPointSearch did not return a path to a goal: %s' % path)
+            return False
+
+        cost = problem.getCostOfActions(path)
+        if abs(cost - gold_cost) > 1e-9:
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tjumpPointSearch path cost %s, optimal is %s' % (cost, gold_cost))
+            return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tpacman layout:\t\t%s' % self.layoutName)
+        grades.addMessage('\tsolution cost:\t\t%s' % cost)
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        problem = self.setupProblem(searchAgents)
+        path = search.uniformCostSearch(problem)
+        handle.write('solution_cost: "%r"\n' % problem.getCostOfActions(path))
+        handle.close()
+        return True
+
+class MemoryBoundedSearchTest(testClasses.TestCase):
+
+    def __init__(self, question, testDict):
+        super(MemoryBoundedSearchTest, self).__init__(question, testDict)
+        self.alg = testDict['algorithm']
+        self.graph_text = testDict.get('graph')
+        self.layoutText = testDict.get('layout')
+        self.layoutName = testDict.get('layoutName', 'graph')
+        self.maxNodes = int(testDict['maxNodes']) if 'maxNodes' in testDict else None
+        self.forgets = testDict.get('forgets', 'False') == 'True'
+        if 'heuristic' in testDict:
+            self.heuristic = parseHeuristic(testDict['heuristic'])
+        else:
+            self.heuristic = None
+
+    def setupProblem(self, searchAgents):
+        """
+        Returns the problem, its heuristic and a function giving (expansions,
+        distinct states expanded) once it has been searched.
+        """
+        if self.graph_text is not None:
+            problem = GraphSearch(self.graph_text)
+            heuristic = self.heuristic
+            counts = lambda: (len(problem.expanded_states), len(set(problem.expanded_states)))
+        else:
+            lay = layout.Layout([l.strip() for l in self.layoutText.split('\n')])
+            gameState = pacman.GameState()
+            gameState.initialize(lay, 0)
+            problem = searchAgents.PositionSearchProblem(gameState, goal=gameState.getFood().asList()[0],
+                                                         warn=False, visualize=False)
+            heuristic = searchAgents.manhattanHeuristic
+            counts = lambda: (problem._expanded, len(problem._visited))
+        return problem, heuristic, counts
+
+    def execute(self, grades, moduleDict, solutionDict):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        gold_cost = float(solutionDict['solution_cost'])
+        problem, heuristic, counts = self.setupProblem(searchAgents)
+        alg = getattr(search, self.alg)
+        if self.maxNodes is not None:
+            solution = alg(problem, heuristic, maxNodes=self.maxNodes)
+        else:
+            solution = alg(problem, heuristic)
+
+        if type(solution) != type([]):
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\tThe result of %s must be a list. (Instead, it is %s)' % (self.alg, type(solution)))
+            return False
+
+        cost = problem.getCostOfActions(solution)
+        if cost != gold_cost or not checkSolution(self.setupProblem(searchAgents)[0], solution):
+            grades.addMessage('FAIL: %s' % self.path)
+            grades.addMessage('\t%s path cost %s, optimal is %s' % (self.alg, cost, gold_cost))
+            return False
+
+        expansions, distinct = counts()
+        if self.forgets:
+            unbounded, _, unboundedCounts = self.setupProblem(searchAgents)
+            alg(unbounded, heuristic)
+            if expansions <= unboundedCounts()[0]:
+                grades.addMessage('FAIL: %s' % self.path)
+                grades.addMessage('\tmaxNodes=%s should have forced forgotten states to be regenerated' % self.maxNodes)
+                return False
+
+        grades.addMessage('PASS: %s' % self.path)
+        grades.addMessage('\tproblem:\t\t%s' % self.layoutName)
+        grades.addMessage('\tsolution cost:\t\t%s' % cost)
+        grades.addMessage('\texpansions:\t\t%s (%s distinct states)' % (expansions, distinct))
+        return True
+
+    def writeSolution(self, moduleDict, filePath):
+        search = moduleDict['search']
+        searchAgents = moduleDict['searchAgents']
+        handle = open(filePath, 'w')
+        handle.write('# This is the solution file for %s.\n' % self.path)
+        handle.write('# The optimal cost, found by aStarSearch.\n')
+        problem, heuristic, _ = self.setupProblem(searchAgents)
+        solution = search.aStarSearch(problem, heuristic)
+        handle.write('solution_cost: "%s"\n' % problem.getCostOfActions(solution))
+        handle.close()
+        return True
@@ -205,6 +205,168 @@ class PriorityQueue:
         else:
             self.push(item, priority)
 
+class IndexedPriorityQueue:
+    """
+      A binary heap that also maps each item to its slot in the heap, so an
+      item's priority can be lowered in O(log n) (update) instead of the
+      linear scan PriorityQueue.update does.  Items must be hashable and
+      can be in the queue at most once.
+
+      Ties are broken first-in first-out, and an item whose priority is
+      lowered counts as newly inserted at that point.
+    """
+    def  __init__(self):
+        self.heap = []      # [priority, count, item] entries
+        self.slots = {}     # item -> index of its entry in self.heap
+        self.count = 0
+
+    def push(self, item, priority):
+        if item in self.slots:
+            raise ValueError('item is already in the queue: ' + str(item))
+        self.heap.append([priority, self.count, item])
+        self.count += 1
+        self.slots[item] = len(self.heap) - 1
+        self._siftUp(len(self.heap) - 1)
+
+    def peek(self):
+        "Returns the item pop would return, without removing it."
+        return self.heap[0][2]
+
+    def pop(self):
+        heap = self.heap
+        last = heap.pop()
+        if not heap:
+            del self.slots[last[2]]
+            return last[2]
+        top = heap[0]
+        heap[0] = last
+        self.slots[last[2]] = 0
+        del self.slots[top[2]]
+        self._siftDown(0)
+        return top[2]
+
+    def isEmpty(self):
+        return len(self.heap) == 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return item in self.slots
+
+    def getPriority(self, item):
+        return self.heap[self.slots[item]][0]
+
+    def update(self, item, priority):
+        """
+        Inserts item, or lowers its priority if it is already queued with a
+        higher one.  Returns True if the queue changed.
+        """
+        slot = self.slots.get(item)
+        if slot is None:
+            self.push(item, priority)
+            return True
+        entry = self.heap[slot]
+        if entry[0] <= priority:
+            return False
+        entry[0] = priority
+        entry[1] = self.count
+        self.count += 1
+        self._siftUp(slot)
+        return True
+
+    def _siftUp(self, i):
+        heap, slots = self.heap, self.slots
+        entry = heap[i]
+        key = (entry[0], entry[1])
+        while i > 0:
+            parentIndex = (i - 1) >> 1
+            parent = heap[parentIndex]
+            if (parent[0], parent[1]) <= key:
+                break
+            heap[i] = parent
+            slots[parent[2]] = i
+            i = parentIndex
+        heap[i] = entry
+        slots[entry[2]] = i
+
+    def _siftDown(self, i):
+        heap, slots = self.heap, self.slots
+        n = len(heap)
+        entry = heap[i]
+        key = (entry[0], entry[1])
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and (heap[child + 1][0], heap[child + 1][1]) < (heap[child][0], heap[child][1]):
+                child += 1
+            if key <= (heap[child][0], heap[child][1]):
+                break
+            heap[i] = heap[child]
+            slots[heap[i][2]] = i
+            i = child
+        heap[i] = entry
+        slots[entry[2]] = i
+
+class LazyPriorityQueue:
+    """
+      The lazy-deletion alternative to IndexedPriorityQueue with the same
+      interface: update pushes a fresh entry and marks the old one dead, and
+      pop skips dead entries.  Cheaper per update, at the cost of a heap that
+      can hold stale entries.
+    """
+    def  __init__(self):
+        self.heap = []
+        self.entries = {}   # item -> its live [priority, count, item, alive] entry
+        self.count = 0
+
+    def push(self, item, priority):
+        if item in self.entries:
+            raise ValueError('item is already in the queue: ' + str(item))
+        entry = [priority, self.count, item, True]
+        self.count += 1
+        self.entries[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def peek(self):
+        "Returns the item pop would return, without removing it."
+        while not self.heap[0][3]:
+            heapq.heappop(self.heap)
+        return self.heap[0][2]
+
+    def pop(self):
+        while self.heap:
+            entry = heapq.heappop(self.heap)
+            if entry[3]:
+                del self.entries[entry[2]]
+                return entry[2]
+        raise IndexError('pop from an empty priority queue')
+
+    def isEmpty(self):
+        return len(self.entries) == 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def getPriority(self, item):
+        return self.entries[item][0]
+
+    def remove(self, item):
+        self.entries.pop(item)[3] = False
+
+    def update(self, item, priority):
+        entry = self.entries.get(item)
+        if entry is not None:
+            if entry[0] <= priority:
+                return False
+            self.remove(item)
+        self.push(item, priority)
+        return True
+
 class PriorityQueueWithFunction(PriorityQueue):
     """
     Implements a priority queue with the same push/pop signature of the